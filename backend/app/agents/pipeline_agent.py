@@ -12,6 +12,12 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Prefer the libyaml-backed loader; fall back to the pure-Python one
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlSafeLoader
+
 class PipelineAgent:
     """Pipeline Agent for generating CI/CD pipelines with AI and KB citations"""
 
@@ -302,7 +308,7 @@ class PipelineAgent:
     def _validate_yaml(self, yaml_content: str) -> Dict[str, Any]:
         """Validate YAML syntax"""
         try:
-            parsed = yaml.safe_load(yaml_content)
+            parsed = yaml.load(yaml_content, Loader=_YamlSafeLoader)
             return {
                 "status": "valid",
                 "parsed": True,
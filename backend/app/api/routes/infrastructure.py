@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any, List, Optional
+from functools import lru_cache
 import logging
 from app.agents.infrastructure_agent import InfrastructureAgent
 from app.core.kb_manager import KnowledgeBaseManager
@@ -20,12 +22,15 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# One audit logger (and writer thread) shared by every request
+audit_logger = AuditLogger()
+
 # Dependency injection
+@lru_cache(maxsize=1)
 def get_infrastructure_agent() -> InfrastructureAgent:
-    """Get Infrastructure Agent instance with dependencies"""
+    """Get the shared Infrastructure Agent instance with dependencies"""
     kb_manager = KnowledgeBaseManager()
     citation_engine = CitationEngine(kb_manager)
-    audit_logger = AuditLogger()
     ai_service = AIService()
 
     return InfrastructureAgent(
@@ -35,9 +40,10 @@ def get_infrastructure_agent() -> InfrastructureAgent:
         ai_service=ai_service
     )
 
+@lru_cache(maxsize=1)
 def get_pr_orchestrator() -> PROrchestrator:
-    """Get PR Orchestrator instance"""
-    return PROrchestrator()
+    """Get the shared PR Orchestrator instance"""
+    return PROrchestrator(audit_logger)
 
 @router.post("/generate", response_model=InfrastructureGenerateResponse)
 async def generate_infrastructure(
@@ -50,7 +56,8 @@ async def generate_infrastructure(
         logger.info(f"Generating infrastructure for target: {request.target}")
 
         # Generate infrastructure
-        result = agent.generate_infrastructure(
+        result = await run_in_threadpool(
+            agent.generate_infrastructure,
             target=request.target,
             environments=request.environments,
             domain=request.domain or f"app-{request.target}.example.com",
@@ -96,7 +103,7 @@ async def validate_infrastructure(
         # Validate Terraform if provided
         if request.terraform:
             try:
-                terraform_plan = agent._run_terraform_plan(request.terraform)
+                terraform_plan = await run_in_threadpool(agent._run_terraform_plan, request.terraform)
                 if terraform_plan["status"] == "failed":
                     validation_results["terraform_valid"] = False
                     validation_results["terraform_errors"].append(terraform_plan.get("errors", "Unknown error"))
@@ -107,7 +114,7 @@ async def validate_infrastructure(
         # Validate Helm if provided
         if request.helm:
             try:
-                helm_dry_run = agent._run_helm_dry_run(request.helm)
+                helm_dry_run = await run_in_threadpool(agent._run_helm_dry_run, request.helm)
                 if helm_dry_run["status"] == "failed":
                     validation_results["helm_valid"] = False
                     validation_results["helm_errors"].append(helm_dry_run.get("errors", "Unknown error"))
@@ -211,7 +218,8 @@ This configuration was generated using the following sources:
             artifacts["helm_dry_run"] = request.helm_dry_run
 
         # Create PR with artifacts
-        pr_url = pr_orchestrator.create_pr_with_artifacts(
+        pr_url = await run_in_threadpool(
+            pr_orchestrator.create_pr_with_artifacts,
             repo_url=request.repo_url,
             files=files,
             title=f"[F-Ops] Add {request.target} infrastructure configuration",
@@ -236,8 +244,10 @@ This configuration was generated using the following sources:
 async def infrastructure_health_check():
     """Health check for Infrastructure Agent"""
     try:
-        # Basic health check - ensure dependencies are available
+        # Basic health check - probe the shared agent's dependencies instead of rebuilding them
         agent = get_infrastructure_agent()
+        if not await run_in_threadpool(agent.kb.ping):
+            raise RuntimeError("Knowledge base unreachable")
 
         return {
             "status": "healthy",
@@ -318,7 +328,7 @@ async def run_terraform_plan(request: Dict[str, Any]):
         if not config:
             raise HTTPException(status_code=400, detail="Terraform configuration required")
 
-        plan_result = agent._run_terraform_plan(config)
+        plan_result = await run_in_threadpool(agent._run_terraform_plan, config)
 
         return {
             "success": True,
@@ -342,7 +352,7 @@ async def run_helm_dry_run(request: Dict[str, Any]):
         if not chart:
             raise HTTPException(status_code=400, detail="Helm chart configuration required")
 
-        dry_run_result = agent._run_helm_dry_run(chart)
+        dry_run_result = await run_in_threadpool(agent._run_helm_dry_run, chart)
 
         return {
             "success": True,
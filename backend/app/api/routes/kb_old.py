@@ -72,14 +72,16 @@ async def search_knowledge(request: SearchRequest):
                 k=request.limit,
                 filter_dict=request.filters
             )
+            count = len(results)
         else:
             results = kb.search_all(query=request.query, k=request.limit)
+            count = sum(map(len, results.values()))
         
         return {
             "success": True,
             "query": request.query,
             "results": results,
-            "count": len(results) if isinstance(results, list) else sum(len(v) for v in results.values())
+            "count": count
         }
     except Exception as e:
         logger.error(f"Search failed: {e}")
@@ -89,12 +91,13 @@ async def search_knowledge(request: SearchRequest):
 async def add_document(request: DocumentRequest):
     """Add a document to the knowledge base"""
     try:
-        doc_id = kb.add_document(
+        # Async batch path: splitting, embedding and the Chroma write stay off the event loop
+        [doc_id] = await kb.aadd_documents_batch(
             collection=request.collection,
-            document={
+            documents=[{
                 "content": request.content,
                 "metadata": request.metadata
-            }
+            }]
         )
         
         # Log the addition
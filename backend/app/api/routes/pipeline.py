@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from app.agents.pipeline_agent import PipelineAgent
 from app.core.kb_manager import KnowledgeBaseManager
 from app.core.audit_logger import AuditLogger
@@ -23,6 +23,10 @@ audit_logger = AuditLogger()
 pr_orchestrator = PROrchestrator(audit_logger)
 pipeline_agent = PipelineAgent(kb_manager, audit_logger)
 
+def _pack_response(model: BaseModel) -> Response:
+    """Serialize a response model straight to compact JSON bytes, skipping jsonable_encoder"""
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
 # Additional schema models for enhanced functionality
 class PipelineGenerateRequest(BaseModel):
     repo_url: str
@@ -440,7 +444,7 @@ async def comprehensive_code_analysis(request: CodeAnalysisRequest):
             "status": "success"
         })
 
-        return CodeAnalysisResponse(**analysis_result)
+        return _pack_response(CodeAnalysisResponse(**analysis_result))
 
     except HTTPException:
         raise
@@ -522,7 +526,7 @@ async def intelligent_pipeline_generation(request: IntelligentPipelineRequest):
             "status": "success"
         })
 
-        return IntelligentPipelineResponse(**pipeline_result)
+        return _pack_response(IntelligentPipelineResponse(**pipeline_result))
 
     except HTTPException:
         raise
@@ -10,6 +10,7 @@ class Settings(BaseSettings):
     SQLITE_URL: str = "sqlite:///./fops.db"
     CHROMA_PERSIST_DIR: str = "./chroma_db"
     AUDIT_LOG_DIR: str = "./audit_logs"
+    JOBS_DB_PATH: str = "./fops_jobs.db"
 
     # MCP Servers (local)
     MCP_GITHUB_TOKEN: str = ""
@@ -19,6 +20,8 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     ANTHROPIC_API_KEY: str = ""
     DEFAULT_MODEL: str = "gpt-4"
+    RACE_PROVIDERS: bool = False  # Query OpenAI and Anthropic concurrently, keep the first success
+    USE_CHROMA_EMBEDDER: bool = False  # Let Chroma's collection embedding function embed KB documents and queries
 
     # Security
     ALLOWED_REPOS: List[str] = []  # Allow-listed repos
@@ -1,20 +1,636 @@
 """
 AI Service for F-Ops - Handles LLM integration for repository analysis and pipeline generation
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
 import openai
 import anthropic
+import httpx
+import copy
+import hashlib
+import heapq
 import json
 import os
+import re
+import string
 import logging
 from pathlib import Path
 import tempfile
 import subprocess
+import threading
 import shutil
+import yaml
 from app.config import settings
 
+# Prefer the libyaml-backed loader; fall back to the pure-Python one
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlSafeLoader
+
 logger = logging.getLogger(__name__)
 
+# Shared decoder for AI responses
+_JSON_DECODER = json.JSONDecoder()
+
+# Matches the body of a ```json (or bare ```) fenced block in AI responses
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.S)
+
+# Deploy job appended to the intelligent templates once per environment
+_INTELLIGENT_DEPLOY_JOB_TPL = string.Template("""
+  deploy-$env:
+    needs: [$needs]
+    runs-on: ubuntu-latest
+    if: github.ref == 'refs/heads/main'
+    environment: $env
+    steps:
+      - uses: actions/checkout@v4
+      - name: Deploy to $env_title
+        run: |
+          echo "Deploying to $env environment"
+          # Add deployment commands here""")
+
+_PYTHON_INTELLIGENT_TPL = string.Template("""name: F-Ops Intelligent CI/CD Pipeline
+
+on:
+  push:
+    branches: [main, develop]
+  pull_request:
+    branches: [main]
+
+env:
+  PYTHON_VERSION: '3.9'
+  TARGET_PLATFORM: $target
+
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    strategy:
+      matrix:
+        python-version: ['3.8', '3.9', '3.10']
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Set up Python $${{ matrix.python-version }}
+        uses: actions/setup-python@v4
+        with:
+          python-version: $${{ matrix.python-version }}
+
+      - name: Cache pip dependencies
+        uses: actions/cache@v3
+        with:
+          path: ~/.cache/pip
+          key: $${{ runner.os }}-pip-$${{ hashFiles('**/requirements.txt') }}
+          restore-keys: |
+            $${{ runner.os }}-pip-
+
+      - name: Install dependencies
+        run: |
+          python -m pip install --upgrade pip
+          pip install -r requirements.txt
+          pip install pytest pytest-cov flake8 black safety bandit
+
+      - name: Code formatting check
+        run: black --check .
+
+      - name: Lint with flake8
+        run: flake8 . --count --select=E9,F63,F7,F82 --show-source --statistics
+
+      - name: Run tests with coverage
+        run: |
+          pytest --cov=. --cov-report=xml --cov-report=html
+
+      - name: Upload coverage to Codecov
+        uses: codecov/codecov-action@v3
+        with:
+          file: ./coverage.xml
+
+  security-scan:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Set up Python
+        uses: actions/setup-python@v4
+        with:
+          python-version: '3.9'
+
+      - name: Install security tools
+        run: |
+          pip install safety bandit semgrep
+
+      - name: Check dependencies for vulnerabilities
+        run: safety check --json
+
+      - name: Run Bandit security linter
+        run: bandit -r . -f json
+
+      - name: Run Semgrep security scan
+        run: semgrep --config=auto .
+
+  build:
+    needs: [test, security-scan]
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Set up Python
+        uses: actions/setup-python@v4
+        with:
+          python-version: '3.9'
+
+      - name: Build package
+        run: |
+          pip install build
+          python -m build
+
+      - name: Upload build artifacts
+        uses: actions/upload-artifact@v3
+        with:
+          name: python-package
+          path: dist/
+$env_jobs
+""")
+
+_JAVASCRIPT_INTELLIGENT_TPL = string.Template("""name: F-Ops Intelligent CI/CD Pipeline
+
+on:
+  push:
+    branches: [main, develop]
+  pull_request:
+    branches: [main]
+
+env:
+  NODE_VERSION: '18'
+  TARGET_PLATFORM: $target
+
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    strategy:
+      matrix:
+        node-version: ['16', '18', '20']
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Setup Node.js $${{ matrix.node-version }}
+        uses: actions/setup-node@v3
+        with:
+          node-version: $${{ matrix.node-version }}
+          cache: 'npm'
+
+      - name: Install dependencies
+        run: npm ci
+
+      - name: Run linting
+        run: npm run lint
+
+      - name: Run type checking
+        run: npm run type-check
+
+      - name: Run tests
+        run: npm run test:coverage
+
+      - name: Upload coverage to Codecov
+        uses: codecov/codecov-action@v3
+
+  security-scan:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Setup Node.js
+        uses: actions/setup-node@v3
+        with:
+          node-version: '18'
+          cache: 'npm'
+
+      - name: Install dependencies
+        run: npm ci
+
+      - name: Run security audit
+        run: npm audit --audit-level high
+
+      - name: Run Snyk security scan
+        uses: snyk/actions/node@master
+        env:
+          SNYK_TOKEN: $${{ secrets.SNYK_TOKEN }}
+
+  build:
+    needs: [test, security-scan]
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Setup Node.js
+        uses: actions/setup-node@v3
+        with:
+          node-version: '18'
+          cache: 'npm'
+
+      - name: Install dependencies
+        run: npm ci
+
+      - name: Build application
+        run: npm run build
+
+      - name: Upload build artifacts
+        uses: actions/upload-artifact@v3
+        with:
+          name: build-files
+          path: dist/
+$env_jobs
+""")
+
+_GENERIC_INTELLIGENT_TPL = string.Template("""name: F-Ops Intelligent CI/CD Pipeline
+
+on:
+  push:
+    branches: [main, develop]
+  pull_request:
+    branches: [main]
+
+env:
+  TARGET_PLATFORM: $target
+  PRIMARY_LANGUAGE: $language
+
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Setup Build Environment
+        run: |
+          echo "Setting up environment for $language"
+          # Add language-specific setup here
+
+      - name: Install Dependencies
+        run: |
+          echo "Installing dependencies for $language"
+          # Add dependency installation here
+
+      - name: Run Tests
+        run: |
+          echo "Running tests for $language"
+          # Add test commands here
+
+      - name: Security Scan
+        run: |
+          echo "Running security scan for $language"
+          # Add security scanning here
+
+  deploy:
+    needs: test
+    runs-on: ubuntu-latest
+    if: github.ref == 'refs/heads/main'
+    strategy:
+      matrix:
+        environment: $environments
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Deploy to $${{ matrix.environment }}
+        run: |
+          echo "Deploying to $${{ matrix.environment }} environment on $target"
+          # Add deployment commands here
+""")
+
+_FALLBACK_PIPELINE = """name: F-Ops Fallback CI/CD Pipeline
+
+on:
+  push:
+    branches: [main]
+  pull_request:
+    branches: [main]
+
+jobs:
+  build-and-test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+
+      - name: Setup Environment
+        run: echo "Setting up build environment"
+
+      - name: Install Dependencies
+        run: echo "Installing dependencies"
+
+      - name: Run Tests
+        run: echo "Running tests"
+
+      - name: Deploy
+        if: github.ref == 'refs/heads/main'
+        run: echo "Deploying application"
+"""
+
+
+# Files read in full during comprehensive analysis
+_IMPORTANT_EXTENSIONS = frozenset({'.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.go', '.rb', '.php', '.cs', '.cpp', '.c', '.h'})
+_CONFIG_FILES = frozenset({'package.json', 'requirements.txt', 'Dockerfile', 'docker-compose.yml', 'pom.xml', 'build.gradle', 'Cargo.toml'})
+
+# Directories never descended into during comprehensive analysis
+_SKIP_DIRS = frozenset({
+    'node_modules', '__pycache__', 'dist', 'build', 'target', 'vendor',
+    '.git', '.venv', 'venv', '.tox', '.mypy_cache', '.pytest_cache', 'coverage', 'site-packages', '.next'
+})
+
+# File stems that usually mark an application entry point
+_ENTRYPOINT_STEMS = frozenset({'main', '__main__', 'app', 'index', 'server', 'manage', 'wsgi', 'asgi'})
+
+# Manifest keyword -> framework name, in detection priority order
+_PY_MANIFEST_FRAMEWORKS = (("fastapi", "fastapi"), ("django", "django"), ("flask", "flask"))
+_JS_MANIFEST_FRAMEWORKS = (
+    ("react", "react"), ("vue", "vue"), ("angular", "angular"), ("express", "express"), ("next", "nextjs")
+)
+
+# Case-insensitive alternations so content is scanned once without a lowercased copy.
+# The lookahead keeps overlapping hits (e.g. "vue" and "express" in "vuexpress").
+_MANIFEST_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(keyword for keyword, _ in _PY_MANIFEST_FRAMEWORKS + _JS_MANIFEST_FRAMEWORKS) + "))",
+    re.IGNORECASE
+)
+
+# Source-file keyword -> display name for comprehensive analysis
+_PY_SOURCE_FRAMEWORKS = {
+    "fastapi": "FastAPI", "flask": "Flask", "django": "Django", "streamlit": "Streamlit", "uvicorn": "Uvicorn"
+}
+_JS_SOURCE_FRAMEWORKS = {
+    "react": "React", "vue": "Vue", "angular": "Angular", "express": "Express", "next": "Next.js"
+}
+_PY_SOURCE_FRAMEWORK_RE = re.compile("(?=(" + "|".join(_PY_SOURCE_FRAMEWORKS) + "))", re.IGNORECASE)
+_JS_SOURCE_FRAMEWORK_RE = re.compile("(?=(" + "|".join(_JS_SOURCE_FRAMEWORKS) + "))", re.IGNORECASE)
+
+# Feature bits accumulated by the single-pass classifier in _compute_heuristic_analysis
+_PY_MANIFEST = 1 << 0
+_JS_MANIFEST = 1 << 1
+_GO_MANIFEST = 1 << 2
+_RUST_MANIFEST = 1 << 3
+_JAVA_MANIFEST = 1 << 4
+_HAS_DOCKER = 1 << 5
+_HAS_CI = 1 << 6
+_HAS_TESTS = 1 << 7
+_STATIC_HINT = 1 << 8
+_SERVERLESS_HINT = 1 << 9
+
+# Exact repository paths that set a feature bit
+_PATH_FLAGS = {
+    "requirements.txt": _PY_MANIFEST,
+    "setup.py": _PY_MANIFEST,
+    "pyproject.toml": _PY_MANIFEST,
+    "package.json": _JS_MANIFEST,
+    "go.mod": _GO_MANIFEST,
+    "Cargo.toml": _RUST_MANIFEST,
+    "pom.xml": _JAVA_MANIFEST,
+    "Dockerfile": _HAS_DOCKER,
+    "docker-compose.yml": _HAS_DOCKER,
+}
+_MANIFEST_BITS = _PY_MANIFEST | _JS_MANIFEST | _GO_MANIFEST | _RUST_MANIFEST | _JAVA_MANIFEST
+
+# Manifest bit -> (language, build system, manifest sniffed for a framework, framework priority).
+# Lower bits win, so the lowest set manifest bit picks the entry in one lookup.
+_MANIFEST_DISPATCH = {
+    _PY_MANIFEST: ("python", "pip", "requirements.txt", _PY_MANIFEST_FRAMEWORKS),
+    _JS_MANIFEST: ("javascript", "npm", "package.json", _JS_MANIFEST_FRAMEWORKS),
+    _GO_MANIFEST: ("go", "go", None, None),
+    _RUST_MANIFEST: ("rust", "cargo", None, None),
+    _JAVA_MANIFEST: ("java", "maven", None, None),
+}
+_CI_NEEDLES = (".github/workflows", ".gitlab-ci.yml", "Jenkinsfile")
+_TEST_NEEDLES = ("test", "spec", "pytest")
+# Case-insensitive so paths are matched without allocating a lowercased copy each
+_TEST_NEEDLE_RE = re.compile("|".join(_TEST_NEEDLES), re.IGNORECASE)
+
+# Heuristic analysis results keyed by repository fingerprint, LRU-bounded
+_HEURISTIC_CACHE_SIZE = 512
+_heuristic_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+# Framework detection results keyed by (content digest, detector kind), LRU-bounded
+_FRAMEWORK_CACHE_SIZE = 4096
+_framework_cache: "OrderedDict[Tuple[bytes, str], FrozenSet[str]]" = OrderedDict()
+
+
+@lru_cache(maxsize=128)
+def _render_intelligent_deploy_jobs(needs: str, environments: Tuple[str, ...]) -> str:
+    """Render the per-environment deploy jobs for the intelligent templates"""
+    return "\n".join(
+        _INTELLIGENT_DEPLOY_JOB_TPL.substitute(env=env, env_title=env.title(), needs=needs)
+        for env in environments
+    )
+
+@lru_cache(maxsize=64)
+def _render_deployment_jobs(environments: Tuple[str, ...], target: str) -> str:
+    """Render deployment jobs for each environment"""
+    jobs = []
+
+    for env in environments:
+        condition = "github.ref == 'refs/heads/main'" if env == 'prod' else "true"
+
+        job = f"""
+  deploy-{env}:
+    needs: build
+    runs-on: ubuntu-latest
+    if: {condition}
+    environment: {env}
+    steps:
+      - uses: actions/checkout@v4
+      - name: Deploy to {env} ({target})
+        run: |
+          echo "Deploying to {env} environment using {target}"
+          # Add actual deployment commands here"""
+
+        jobs.append(job)
+
+    return "\n".join(jobs)
+
+
+@lru_cache(maxsize=64)
+def _render_python_template_pipeline(framework: str, target: str, environments: Tuple[str, ...]) -> str:
+    """Python pipeline template"""
+    return f"""name: F-Ops Generated CI/CD Pipeline
+on:
+  push:
+    branches: [main, develop]
+  pull_request:
+    branches: [main]
+
+env:
+  PYTHON_VERSION: '3.9'
+  TARGET_ENVIRONMENT: {target}
+
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - name: Set up Python
+        uses: actions/setup-python@v4
+        with:
+          python-version: ${{{{ env.PYTHON_VERSION }}}}
+      - name: Install dependencies
+        run: |
+          python -m pip install --upgrade pip
+          pip install -r requirements.txt
+      - name: Run tests
+        run: |
+          python -m pytest --cov=. --cov-report=xml || echo "No tests found"
+      - name: Security scan
+        run: |
+          pip install bandit safety
+          bandit -r . || echo "Security scan completed"
+          safety check || echo "Dependency check completed"
+
+  build:
+    needs: test
+    runs-on: ubuntu-latest
+    if: github.ref == 'refs/heads/main'
+    steps:
+      - uses: actions/checkout@v4
+      - name: Set up Python
+        uses: actions/setup-python@v4
+        with:
+          python-version: ${{{{ env.PYTHON_VERSION }}}}
+      - name: Build application
+        run: |
+          pip install build
+          python -m build || echo "No build step needed"
+
+{_render_deployment_jobs(environments, target)}
+"""
+
+
+@lru_cache(maxsize=64)
+def _render_javascript_template_pipeline(framework: str, target: str, environments: Tuple[str, ...]) -> str:
+    """JavaScript pipeline template"""
+    return f"""name: F-Ops Generated CI/CD Pipeline
+on:
+  push:
+    branches: [main, develop]
+  pull_request:
+    branches: [main]
+
+env:
+  NODE_VERSION: '18'
+  TARGET_ENVIRONMENT: {target}
+
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - name: Set up Node.js
+        uses: actions/setup-node@v4
+        with:
+          node-version: ${{{{ env.NODE_VERSION }}}}
+          cache: 'npm'
+      - name: Install dependencies
+        run: npm ci
+      - name: Run tests
+        run: npm test || echo "No tests found"
+      - name: Security audit
+        run: npm audit || echo "Security audit completed"
+
+  build:
+    needs: test
+    runs-on: ubuntu-latest
+    if: github.ref == 'refs/heads/main'
+    steps:
+      - uses: actions/checkout@v4
+      - name: Set up Node.js
+        uses: actions/setup-node@v4
+        with:
+          node-version: ${{{{ env.NODE_VERSION }}}}
+          cache: 'npm'
+      - name: Install dependencies
+        run: npm ci
+      - name: Build application
+        run: npm run build || echo "No build step needed"
+
+{_render_deployment_jobs(environments, target)}
+"""
+
+
+@lru_cache(maxsize=64)
+def _render_generic_template_pipeline(language: str, target: str, environments: Tuple[str, ...]) -> str:
+    """Generic pipeline template"""
+    return f"""name: F-Ops Generated CI/CD Pipeline
+on:
+  push:
+    branches: [main, develop]
+  pull_request:
+    branches: [main]
+
+env:
+  TARGET_ENVIRONMENT: {target}
+  LANGUAGE: {language}
+
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - name: Setup {language} environment
+        run: echo "Setting up {language} environment"
+      - name: Run tests
+        run: echo "Running {language} tests"
+
+  build:
+    needs: test
+    runs-on: ubuntu-latest
+    if: github.ref == 'refs/heads/main'
+    steps:
+      - uses: actions/checkout@v4
+      - name: Build {language} application
+        run: echo "Building {language} application"
+
+{_render_deployment_jobs(environments, target)}
+"""
+
+@lru_cache(maxsize=1)
+def _get_shared_http_client() -> httpx.Client:
+    """Process-wide HTTP/2 client with keep-alive pooling, shared by the OpenAI and Anthropic SDKs"""
+    return httpx.Client(
+        http2=True,
+        timeout=60.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+    )
+
+# Provider races share one pool; each race holds two threads (one per provider)
+_RACE_MAX_WORKERS = 8
+
+@lru_cache(maxsize=1)
+def _get_race_executor() -> ThreadPoolExecutor:
+    """Process-wide thread pool for provider races"""
+    return ThreadPoolExecutor(max_workers=_RACE_MAX_WORKERS, thread_name_prefix="fops-race")
+
+
+class _RaceStream:
+    """Handle on one provider's streaming response, so the race can close the loser's connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stream = None
+        self._cancelled = False
+
+    def attach(self, stream):
+        """Register an open stream; closes it straight away if the race was already decided"""
+        with self._lock:
+            self._stream = stream
+            cancelled = self._cancelled
+        if cancelled:
+            stream.close()
+
+    def cancel(self):
+        """Close the stream (if open) so its worker stops reading and the HTTP response is released"""
+        with self._lock:
+            self._cancelled = True
+            stream = self._stream
+        if stream is not None:
+            stream.close()
+
+
 class AIService:
     """AI service for repository analysis and pipeline generation"""
 
@@ -25,15 +641,20 @@ class AIService:
         # Initialize AI clients with validation
         if settings.OPENAI_API_KEY and settings.OPENAI_API_KEY.startswith("sk-"):
             try:
-                openai.api_key = settings.OPENAI_API_KEY
-                self.openai_client = openai
+                self.openai_client = openai.OpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    http_client=_get_shared_http_client()
+                )
                 logger.info("OpenAI client initialized successfully")
             except Exception as e:
                 logger.warning(f"Failed to initialize OpenAI client: {e}")
 
         if settings.ANTHROPIC_API_KEY and settings.ANTHROPIC_API_KEY.startswith("sk-ant-"):
             try:
-                self.anthropic_client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+                self.anthropic_client = anthropic.Anthropic(
+                    api_key=settings.ANTHROPIC_API_KEY,
+                    http_client=_get_shared_http_client()
+                )
                 logger.info("Anthropic client initialized successfully")
             except Exception as e:
                 logger.warning(f"Failed to initialize Anthropic client: {e}")
@@ -373,14 +994,12 @@ Focus on accuracy and provide specific, actionable insights. Only respond with t
         try:
             # Try to extract JSON from the response
             start_idx = analysis_text.find('{')
-            end_idx = analysis_text.rfind('}') + 1
-
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = analysis_text[start_idx:end_idx]
-                return json.loads(json_str)
+            if start_idx != -1:
+                analysis, _ = _JSON_DECODER.raw_decode(analysis_text, start_idx)
+                return analysis
             else:
                 # If no JSON found, try to parse the whole response
-                return json.loads(analysis_text)
+                return _JSON_DECODER.decode(analysis_text)
 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse AI analysis JSON: {e}")
@@ -669,7 +1288,8 @@ Focus on accuracy and provide specific, actionable insights. Only respond with t
 
     def _search_pipeline_patterns(self, analysis_result: Optional[Dict[str, Any]], target: Optional[str]) -> List[str]:
         """Search knowledge base for relevant pipeline patterns"""
-        rag_sources = []
+        # Insertion-ordered set of sources for O(1) de-duplication
+        rag_sources: Dict[str, None] = {}
 
         try:
             # Import here to avoid circular imports
@@ -686,13 +1306,15 @@ Focus on accuracy and provide specific, actionable insights. Only respond with t
 
                 # Language-specific searches
                 for lang in languages:
-                    search_queries.append(f"{lang.lower()} ci cd pipeline")
-                    search_queries.append(f"{lang.lower()} build test deploy")
+                    lang_lower = lang.lower()
+                    search_queries.append(f"{lang_lower} ci cd pipeline")
+                    search_queries.append(f"{lang_lower} build test deploy")
 
                 # Framework-specific searches
                 for framework in frameworks:
-                    search_queries.append(f"{framework.lower()} pipeline")
-                    search_queries.append(f"{framework.lower()} deployment")
+                    framework_lower = framework.lower()
+                    search_queries.append(f"{framework_lower} pipeline")
+                    search_queries.append(f"{framework_lower} deployment")
 
                 # Complexity-based searches
                 if complexity == "complex":
@@ -726,17 +1348,16 @@ Focus on accuracy and provide specific, actionable insights. Only respond with t
 
                     for result in all_results:
                         source_info = f"KB: {result.get('metadata', {}).get('source', 'unknown')} - {query}"
-                        if source_info not in rag_sources:
-                            rag_sources.append(source_info)
+                        rag_sources[source_info] = None
 
                 except Exception as e:
                     logger.warning(f"KB search failed for query '{query}': {e}")
 
         except Exception as e:
             logger.warning(f"RAG search failed: {e}")
-            rag_sources.append("Fallback: Internal pipeline templates")
+            rag_sources["Fallback: Internal pipeline templates"] = None
 
-        return rag_sources
+        return list(rag_sources)
 
     def _generate_optimized_pipeline(self, analysis_result: Optional[Dict[str, Any]], rag_sources: List[str],
                                    local_path: str, target: Optional[str], environments: Optional[List[str]]) -> Dict[str, Any]:
@@ -755,30 +1376,25 @@ Focus on accuracy and provide specific, actionable insights. Only respond with t
         pipeline_prompt = self._build_intelligent_pipeline_prompt(context)
 
         try:
+            # Race both providers when configured, keeping whichever answers first
+            if settings.RACE_PROVIDERS and self.openai_client and self.anthropic_client:
+                content = self._race_providers(pipeline_prompt, max_tokens=4000, temperature=0.2)
+                if content is not None:
+                    return self._parse_pipeline_response(content.strip(), analysis_result)
+
             # Try OpenAI first (as per user preference)
-            if self.openai_client:
+            elif self.openai_client:
                 try:
-                    response = self.openai_client.chat.completions.create(
-                        model=settings.DEFAULT_MODEL,
-                        messages=[{"role": "user", "content": pipeline_prompt}],
-                        max_tokens=4000,
-                        temperature=0.2
-                    )
-                    content = response.choices[0].message.content.strip()
-                    return self._parse_pipeline_response(content, analysis_result)
+                    content = self._stream_openai_completion(pipeline_prompt, max_tokens=4000, temperature=0.2)
+                    return self._parse_pipeline_response(content.strip(), analysis_result)
                 except Exception as e:
                     logger.warning(f"OpenAI pipeline generation failed: {e}")
 
             # Try Anthropic as fallback
             elif self.anthropic_client:
                 try:
-                    response = self.anthropic_client.messages.create(
-                        model="claude-3-sonnet-20240229",
-                        max_tokens=4000,
-                        messages=[{"role": "user", "content": pipeline_prompt}]
-                    )
-                    content = response.content[0].text.strip()
-                    return self._parse_pipeline_response(content, analysis_result)
+                    content = self._stream_anthropic_completion(pipeline_prompt, max_tokens=4000)
+                    return self._parse_pipeline_response(content.strip(), analysis_result)
                 except Exception as e:
                     logger.warning(f"Anthropic pipeline generation failed: {e}")
 
@@ -789,6 +1405,68 @@ Focus on accuracy and provide specific, actionable insights. Only respond with t
             logger.error(f"Optimized pipeline generation failed: {e}")
             return self._generate_template_based_pipeline(context)
 
+    def _stream_openai_completion(self, prompt: str, max_tokens: int, temperature: float,
+                                  handle: Optional[_RaceStream] = None) -> str:
+        """Stream an OpenAI chat completion and return the accumulated text"""
+        stream = self.openai_client.chat.completions.create(
+            model=settings.DEFAULT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        if handle is not None:
+            handle.attach(stream)
+
+        chunks = []
+        for chunk in stream:
+            if chunk.choices:
+                chunks.append(chunk.choices[0].delta.content or "")
+        return "".join(chunks)
+
+    def _stream_anthropic_completion(self, prompt: str, max_tokens: int,
+                                     handle: Optional[_RaceStream] = None) -> str:
+        """Stream an Anthropic message and return the accumulated text"""
+        with self.anthropic_client.messages.stream(
+            model="claude-3-sonnet-20240229",
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            if handle is not None:
+                handle.attach(stream)
+            return "".join(stream.text_stream)
+
+    def _race_providers(self, prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
+        """Query OpenAI and Anthropic concurrently and return the first successful completion"""
+        executor = _get_race_executor()
+        handles = {"OpenAI": _RaceStream(), "Anthropic": _RaceStream()}
+        futures = {
+            executor.submit(self._stream_openai_completion, prompt, max_tokens, temperature,
+                            handles["OpenAI"]): "OpenAI",
+            executor.submit(self._stream_anthropic_completion, prompt, max_tokens,
+                            handles["Anthropic"]): "Anthropic",
+        }
+
+        try:
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        content = future.result()
+                    except Exception as e:
+                        logger.warning(f"{futures[future]} completion failed during provider race: {e}")
+                        continue
+                    logger.info(f"{futures[future]} returned first in provider race")
+                    return content
+            return None
+        finally:
+            # Stop the slower provider: drop it if it never started, otherwise close its stream
+            # so the generation isn't read (and its connection held) to completion
+            for future, provider in futures.items():
+                if not future.done() and not future.cancel():
+                    handles[provider].cancel()
+
     def _build_intelligent_pipeline_prompt(self, context: Dict[str, Any]) -> str:
         """Build intelligent prompt for pipeline generation"""
 
@@ -853,19 +1531,11 @@ IMPORTANT: Return only the JSON response, no additional text or markdown formatt
         """Parse AI response for pipeline generation"""
         try:
             # Clean and parse JSON response
-            if '```json' in content:
-                start = content.find('```json') + 7
-                end = content.find('```', start)
-                if end != -1:
-                    content = content[start:end]
-            elif '```' in content:
-                start = content.find('```') + 3
-                end = content.find('```', start)
-                if end != -1:
-                    content = content[start:end]
-
-            content = content.strip()
-            response_data = json.loads(content)
+            match = _FENCE_RE.search(content)
+            if match:
+                content = match.group(1)
+
+            response_data = json.loads(content.strip())
 
             # Clean YAML content
             pipeline_content = self._clean_yaml_response(response_data.get("pipeline_content", ""))
@@ -886,315 +1556,51 @@ IMPORTANT: Return only the JSON response, no additional text or markdown formatt
                 "environments": ["staging", "production"]
             })
 
-    def _generate_template_based_pipeline(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate template-based pipeline as fallback"""
-
-        analysis = context.get("analysis", {})
-        target = context.get("target", "k8s")
-        environments = context.get("environments", ["staging", "production"])
-
-        # Detect primary language
-        languages = analysis.get("languages_detected", []) if analysis else []
-        primary_lang = languages[0] if languages else "python"
-
-        if "python" in primary_lang.lower():
-            pipeline_content = self._python_intelligent_template(target, environments)
-        elif "javascript" in primary_lang.lower() or "typescript" in primary_lang.lower():
-            pipeline_content = self._javascript_intelligent_template(target, environments)
-        else:
-            pipeline_content = self._generic_intelligent_template(primary_lang, target, environments)
-
-        return {
-            "content": pipeline_content,
-            "filename": ".github/workflows/ci-cd.yml",
-            "recommendations_applied": ["Template-based generation", "Security scanning included"],
-            "quality_improvements": ["Automated testing", "Multi-environment deployment"],
-            "optimizations": ["Caching enabled", "Parallel job execution"]
-        }
-
-    def _python_intelligent_template(self, target: str, environments: List[str]) -> str:
-        """Python-optimized pipeline template"""
-        env_jobs = "\n".join([f"""
-  deploy-{env}:
-    needs: [test, security-scan]
-    runs-on: ubuntu-latest
-    if: github.ref == 'refs/heads/main'
-    environment: {env}
-    steps:
-      - uses: actions/checkout@v4
-      - name: Deploy to {env.title()}
-        run: |
-          echo "Deploying to {env} environment"
-          # Add deployment commands here""" for env in environments])
-
-        return f"""name: F-Ops Intelligent CI/CD Pipeline
-
-on:
-  push:
-    branches: [main, develop]
-  pull_request:
-    branches: [main]
-
-env:
-  PYTHON_VERSION: '3.9'
-  TARGET_PLATFORM: {target}
-
-jobs:
-  test:
-    runs-on: ubuntu-latest
-    strategy:
-      matrix:
-        python-version: ['3.8', '3.9', '3.10']
-    steps:
-      - uses: actions/checkout@v4
-
-      - name: Set up Python ${{{{ matrix.python-version }}}}
-        uses: actions/setup-python@v4
-        with:
-          python-version: ${{{{ matrix.python-version }}}}
-
-      - name: Cache pip dependencies
-        uses: actions/cache@v3
-        with:
-          path: ~/.cache/pip
-          key: ${{{{ runner.os }}}}-pip-${{{{ hashFiles('**/requirements.txt') }}}}
-          restore-keys: |
-            ${{{{ runner.os }}}}-pip-
-
-      - name: Install dependencies
-        run: |
-          python -m pip install --upgrade pip
-          pip install -r requirements.txt
-          pip install pytest pytest-cov flake8 black safety bandit
-
-      - name: Code formatting check
-        run: black --check .
-
-      - name: Lint with flake8
-        run: flake8 . --count --select=E9,F63,F7,F82 --show-source --statistics
-
-      - name: Run tests with coverage
-        run: |
-          pytest --cov=. --cov-report=xml --cov-report=html
-
-      - name: Upload coverage to Codecov
-        uses: codecov/codecov-action@v3
-        with:
-          file: ./coverage.xml
-
-  security-scan:
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-
-      - name: Set up Python
-        uses: actions/setup-python@v4
-        with:
-          python-version: '3.9'
-
-      - name: Install security tools
-        run: |
-          pip install safety bandit semgrep
-
-      - name: Check dependencies for vulnerabilities
-        run: safety check --json
-
-      - name: Run Bandit security linter
-        run: bandit -r . -f json
-
-      - name: Run Semgrep security scan
-        run: semgrep --config=auto .
-
-  build:
-    needs: [test, security-scan]
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-
-      - name: Set up Python
-        uses: actions/setup-python@v4
-        with:
-          python-version: '3.9'
-
-      - name: Build package
-        run: |
-          pip install build
-          python -m build
-
-      - name: Upload build artifacts
-        uses: actions/upload-artifact@v3
-        with:
-          name: python-package
-          path: dist/
-{env_jobs}
-"""
-
-    def _javascript_intelligent_template(self, target: str, environments: List[str]) -> str:
-        """JavaScript/TypeScript-optimized pipeline template"""
-        env_jobs = "\n".join([f"""
-  deploy-{env}:
-    needs: [test, security-scan, build]
-    runs-on: ubuntu-latest
-    if: github.ref == 'refs/heads/main'
-    environment: {env}
-    steps:
-      - uses: actions/checkout@v4
-      - name: Deploy to {env.title()}
-        run: |
-          echo "Deploying to {env} environment"
-          # Add deployment commands here""" for env in environments])
-
-        return f"""name: F-Ops Intelligent CI/CD Pipeline
-
-on:
-  push:
-    branches: [main, develop]
-  pull_request:
-    branches: [main]
-
-env:
-  NODE_VERSION: '18'
-  TARGET_PLATFORM: {target}
-
-jobs:
-  test:
-    runs-on: ubuntu-latest
-    strategy:
-      matrix:
-        node-version: ['16', '18', '20']
-    steps:
-      - uses: actions/checkout@v4
-
-      - name: Setup Node.js ${{{{ matrix.node-version }}}}
-        uses: actions/setup-node@v3
-        with:
-          node-version: ${{{{ matrix.node-version }}}}
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
-
-      - name: Run linting
-        run: npm run lint
-
-      - name: Run type checking
-        run: npm run type-check
-
-      - name: Run tests
-        run: npm run test:coverage
-
-      - name: Upload coverage to Codecov
-        uses: codecov/codecov-action@v3
-
-  security-scan:
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v3
-        with:
-          node-version: '18'
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
-
-      - name: Run security audit
-        run: npm audit --audit-level high
-
-      - name: Run Snyk security scan
-        uses: snyk/actions/node@master
-        env:
-          SNYK_TOKEN: ${{{{ secrets.SNYK_TOKEN }}}}
-
-  build:
-    needs: [test, security-scan]
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v3
-        with:
-          node-version: '18'
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
-
-      - name: Build application
-        run: npm run build
-
-      - name: Upload build artifacts
-        uses: actions/upload-artifact@v3
-        with:
-          name: build-files
-          path: dist/
-{env_jobs}
-"""
-
-    def _generic_intelligent_template(self, language: str, target: str, environments: List[str]) -> str:
-        """Generic intelligent pipeline template"""
-        return f"""name: F-Ops Intelligent CI/CD Pipeline
-
-on:
-  push:
-    branches: [main, develop]
-  pull_request:
-    branches: [main]
-
-env:
-  TARGET_PLATFORM: {target}
-  PRIMARY_LANGUAGE: {language}
-
-jobs:
-  test:
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-
-      - name: Setup Build Environment
-        run: |
-          echo "Setting up environment for {language}"
-          # Add language-specific setup here
+    def _generate_template_based_pipeline(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate template-based pipeline as fallback"""
 
-      - name: Install Dependencies
-        run: |
-          echo "Installing dependencies for {language}"
-          # Add dependency installation here
+        analysis = context.get("analysis", {})
+        target = context.get("target", "k8s")
+        environments = context.get("environments", ["staging", "production"])
 
-      - name: Run Tests
-        run: |
-          echo "Running tests for {language}"
-          # Add test commands here
+        # Detect primary language
+        languages = analysis.get("languages_detected", []) if analysis else []
+        primary_lang = languages[0] if languages else "python"
+        primary_lang_lower = primary_lang.lower()
 
-      - name: Security Scan
-        run: |
-          echo "Running security scan for {language}"
-          # Add security scanning here
+        if "python" in primary_lang_lower:
+            pipeline_content = self._python_intelligent_template(target, environments)
+        elif "javascript" in primary_lang_lower or "typescript" in primary_lang_lower:
+            pipeline_content = self._javascript_intelligent_template(target, environments)
+        else:
+            pipeline_content = self._generic_intelligent_template(primary_lang, target, environments)
 
-  deploy:
-    needs: test
-    runs-on: ubuntu-latest
-    if: github.ref == 'refs/heads/main'
-    strategy:
-      matrix:
-        environment: {environments}
-    steps:
-      - uses: actions/checkout@v4
+        return {
+            "content": pipeline_content,
+            "filename": ".github/workflows/ci-cd.yml",
+            "recommendations_applied": ["Template-based generation", "Security scanning included"],
+            "quality_improvements": ["Automated testing", "Multi-environment deployment"],
+            "optimizations": ["Caching enabled", "Parallel job execution"]
+        }
 
-      - name: Deploy to ${{{{ matrix.environment }}}}
-        run: |
-          echo "Deploying to ${{{{ matrix.environment }}}} environment on {target}"
-          # Add deployment commands here
-"""
+    def _python_intelligent_template(self, target: str, environments: List[str]) -> str:
+        """Python-optimized pipeline template"""
+        env_jobs = _render_intelligent_deploy_jobs("test, security-scan", tuple(environments))
+        return _PYTHON_INTELLIGENT_TPL.substitute(target=target, env_jobs=env_jobs)
+
+    def _javascript_intelligent_template(self, target: str, environments: List[str]) -> str:
+        """JavaScript/TypeScript-optimized pipeline template"""
+        env_jobs = _render_intelligent_deploy_jobs("test, security-scan, build", tuple(environments))
+        return _JAVASCRIPT_INTELLIGENT_TPL.substitute(target=target, env_jobs=env_jobs)
+
+    def _generic_intelligent_template(self, language: str, target: str, environments: List[str]) -> str:
+        """Generic intelligent pipeline template"""
+        return _GENERIC_INTELLIGENT_TPL.substitute(language=language, target=target, environments=environments)
 
     def _validate_pipeline_yaml(self, pipeline_content: str) -> Dict[str, Any]:
         """Validate pipeline YAML content"""
         try:
-            import yaml
-            yaml.safe_load(pipeline_content)
+            yaml.load(pipeline_content, Loader=_YamlSafeLoader)
             return {
                 "valid": True,
                 "status": "valid_yaml",
@@ -1215,33 +1621,7 @@ jobs:
 
     def _generate_fallback_pipeline(self, local_path: str) -> str:
         """Generate simple fallback pipeline"""
-        return """name: F-Ops Fallback CI/CD Pipeline
-
-on:
-  push:
-    branches: [main]
-  pull_request:
-    branches: [main]
-
-jobs:
-  build-and-test:
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-
-      - name: Setup Environment
-        run: echo "Setting up build environment"
-
-      - name: Install Dependencies
-        run: echo "Installing dependencies"
-
-      - name: Run Tests
-        run: echo "Running tests"
-
-      - name: Deploy
-        if: github.ref == 'refs/heads/main'
-        run: echo "Deploying application"
-"""
+        return _FALLBACK_PIPELINE
 
     def comprehensive_code_analysis(self, local_path: str) -> Dict[str, Any]:
         """Perform comprehensive AI analysis of all code files in local repository"""
@@ -1289,63 +1669,67 @@ jobs:
         }
 
         # Focus on key files for analysis
-        important_extensions = {'.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.go', '.rb', '.php', '.cs', '.cpp', '.c', '.h'}
-        config_files = {'package.json', 'requirements.txt', 'Dockerfile', 'docker-compose.yml', 'pom.xml', 'build.gradle', 'Cargo.toml'}
+        important_extensions = _IMPORTANT_EXTENSIONS
+        config_files = _CONFIG_FILES
 
         try:
             for root, dirs, files in os.walk(local_path):
                 # Skip common non-code directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {'node_modules', '__pycache__', 'dist', 'build', 'target', 'vendor'}]
+                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in _SKIP_DIRS]
 
                 for file in files:
                     if file.startswith('.'):
                         continue
 
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, local_path)
-
                     # Get file extension
                     _, ext = os.path.splitext(file)
+                    ext_lower = ext.lower()
 
                     # Track file types
                     if ext not in detailed_analysis["file_types"]:
                         detailed_analysis["file_types"][ext] = 0
                     detailed_analysis["file_types"][ext] += 1
 
-                    # Analyze important files
-                    if ext.lower() in important_extensions or file in config_files:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()
-                                lines = content.count('\n') + 1
-                                detailed_analysis["total_lines"] += lines
+                    # Only important files need their paths resolved and contents read
+                    if ext_lower not in important_extensions and file not in config_files:
+                        continue
 
-                                file_info = {
-                                    "path": relative_path,
-                                    "type": ext.lower(),
-                                    "lines": lines,
-                                    "size": len(content),
-                                    "content_preview": content[:1000] if len(content) > 1000 else content
-                                }
+                    file_path = os.path.join(root, file)
+                    relative_path = os.path.relpath(file_path, local_path)
+
+                    # Analyze important file
+                    try:
+                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                            content = f.read()
+                            lines = content.count('\n') + 1
+                            detailed_analysis["total_lines"] += lines
 
-                                # Detect language and framework
-                                if ext.lower() in {'.py'}:
-                                    detailed_analysis["languages"].add("Python")
-                                    self._detect_python_frameworks(content, detailed_analysis["frameworks"])
-                                elif ext.lower() in {'.js', '.jsx', '.ts', '.tsx'}:
-                                    detailed_analysis["languages"].add("JavaScript/TypeScript")
-                                    self._detect_js_frameworks(content, detailed_analysis["frameworks"])
-                                elif ext.lower() in {'.java'}:
-                                    detailed_analysis["languages"].add("Java")
-                                elif ext.lower() in {'.go'}:
-                                    detailed_analysis["languages"].add("Go")
-                                elif ext.lower() in {'.rb'}:
-                                    detailed_analysis["languages"].add("Ruby")
-
-                                detailed_analysis["files"].append(file_info)
-
-                        except Exception as e:
-                            logger.warning(f"Could not read file {file_path}: {e}")
+                            file_info = {
+                                "path": relative_path,
+                                "type": ext_lower,
+                                "lines": lines,
+                                "size": len(content),
+                                "content_preview": content[:1000] if len(content) > 1000 else content
+                            }
+
+                            # Detect language and framework
+                            if ext_lower in {'.py'}:
+                                detailed_analysis["languages"].add("Python")
+                                detailed_analysis["frameworks"].update(self._detect_frameworks_cached(content, "python"))
+                            elif ext_lower in {'.js', '.jsx', '.ts', '.tsx'}:
+                                detailed_analysis["languages"].add("JavaScript/TypeScript")
+                                detailed_analysis["frameworks"].update(self._detect_frameworks_cached(content, "js"))
+                            elif ext_lower in {'.java'}:
+                                detailed_analysis["languages"].add("Java")
+                            elif ext_lower in {'.go'}:
+                                detailed_analysis["languages"].add("Go")
+                            elif ext_lower in {'.rb'}:
+                                detailed_analysis["languages"].add("Ruby")
+
+                            detailed_analysis["files"].append(file_info)
+
+                    except Exception as e:
+                        logger.warning(f"Could not read file {file_path}: {e}")
 
         except Exception as e:
             logger.error(f"Error during detailed file analysis: {e}")
@@ -1356,31 +1740,36 @@ jobs:
 
         return detailed_analysis
 
+    def _detect_frameworks_cached(self, content: str, kind: str) -> FrozenSet[str]:
+        """Detect frameworks in file content, memoized by content digest"""
+        key = (hashlib.blake2b(content.encode('utf-8', 'ignore'), digest_size=16).digest(), kind)
+
+        cached = _framework_cache.get(key)
+        if cached is not None:
+            _framework_cache.move_to_end(key)
+            return cached
+
+        frameworks = set()
+        if kind == "python":
+            self._detect_python_frameworks(content, frameworks)
+        else:
+            self._detect_js_frameworks(content, frameworks)
+
+        detected = frozenset(frameworks)
+        _framework_cache[key] = detected
+        if len(_framework_cache) > _FRAMEWORK_CACHE_SIZE:
+            _framework_cache.popitem(last=False)
+        return detected
+
     def _detect_python_frameworks(self, content: str, frameworks: set):
         """Detect Python frameworks from file content"""
-        if 'fastapi' in content.lower() or 'from fastapi' in content:
-            frameworks.add("FastAPI")
-        if 'flask' in content.lower() or 'from flask' in content:
-            frameworks.add("Flask")
-        if 'django' in content.lower() or 'from django' in content:
-            frameworks.add("Django")
-        if 'streamlit' in content.lower():
-            frameworks.add("Streamlit")
-        if 'uvicorn' in content.lower():
-            frameworks.add("Uvicorn")
+        for keyword in set(_PY_SOURCE_FRAMEWORK_RE.findall(content)):
+            frameworks.add(_PY_SOURCE_FRAMEWORKS[keyword.lower()])
 
     def _detect_js_frameworks(self, content: str, frameworks: set):
         """Detect JavaScript frameworks from file content"""
-        if 'react' in content.lower() or 'from react' in content:
-            frameworks.add("React")
-        if 'vue' in content.lower() or 'from vue' in content:
-            frameworks.add("Vue")
-        if 'angular' in content.lower() or '@angular' in content:
-            frameworks.add("Angular")
-        if 'express' in content.lower():
-            frameworks.add("Express")
-        if 'next' in content.lower() or 'next/' in content:
-            frameworks.add("Next.js")
+        for keyword in set(_JS_SOURCE_FRAMEWORK_RE.findall(content)):
+            frameworks.add(_JS_SOURCE_FRAMEWORKS[keyword.lower()])
 
     def _ai_comprehensive_analysis(self, detailed_files: Dict[str, Any], repo_path: str) -> Dict[str, Any]:
         """Use AI to perform comprehensive code analysis"""
@@ -1392,7 +1781,7 @@ jobs:
             "languages": detailed_files["languages"],
             "frameworks": detailed_files["frameworks"],
             "file_types": detailed_files["file_types"],
-            "sample_files": detailed_files["files"][:10]  # Limit to first 10 files for AI analysis
+            "sample_files": self._sample_files_for_prompt(detailed_files["files"])
         }
 
         analysis_prompt = f"""
@@ -1426,13 +1815,8 @@ Focus on actionable insights and specific recommendations. Only respond with the
             # Try OpenAI first (as per user preference)
             if self.openai_client:
                 try:
-                    response = self.openai_client.chat.completions.create(
-                        model=settings.DEFAULT_MODEL,
-                        messages=[{"role": "user", "content": analysis_prompt}],
-                        max_tokens=3000,
-                        temperature=0.2
-                    )
-                    result = self._parse_ai_analysis(response.choices[0].message.content.strip())
+                    content = self._stream_openai_completion(analysis_prompt, max_tokens=3000, temperature=0.2)
+                    result = self._parse_ai_analysis(content.strip())
                     logger.info("OpenAI comprehensive analysis completed successfully")
                     return result
                 except Exception as e:
@@ -1441,12 +1825,8 @@ Focus on actionable insights and specific recommendations. Only respond with the
             # Try Anthropic as fallback
             elif self.anthropic_client:
                 try:
-                    response = self.anthropic_client.messages.create(
-                        model="claude-3-sonnet-20240229",
-                        max_tokens=3000,
-                        messages=[{"role": "user", "content": analysis_prompt}]
-                    )
-                    result = self._parse_ai_analysis(response.content[0].text.strip())
+                    content = self._stream_anthropic_completion(analysis_prompt, max_tokens=3000)
+                    result = self._parse_ai_analysis(content.strip())
                     logger.info("Anthropic comprehensive analysis completed successfully")
                     return result
                 except Exception as e:
@@ -1460,6 +1840,23 @@ Focus on actionable insights and specific recommendations. Only respond with the
             logger.error(f"AI comprehensive analysis failed: {e}")
             return self._comprehensive_heuristic_analysis(detailed_files, repo_path)
 
+    def _sample_files_for_prompt(self, files: List[Dict[str, Any]], limit: int = 10) -> List[Dict[str, Any]]:
+        """Pick the most informative files for the AI prompt and trim their previews"""
+
+        def score(file_info: Dict[str, Any]) -> int:
+            path = Path(file_info["path"])
+            is_config = path.name in _CONFIG_FILES
+            has_main = path.stem in _ENTRYPOINT_STEMS or "__main__" in file_info.get("content_preview", "")
+            return file_info.get("lines", 0) + 2 * is_config + 3 * has_main
+
+        sampled = []
+        for file_info in heapq.nlargest(limit, files, key=score):
+            # Small utilities get a shorter preview; large files keep up to 1000 chars
+            preview_size = max(300, min(1000, file_info.get("lines", 0) * 50))
+            sampled.append({**file_info, "content_preview": file_info.get("content_preview", "")[:preview_size]})
+
+        return sampled
+
     def _comprehensive_heuristic_analysis(self, detailed_files: Dict[str, Any], repo_path: str) -> Dict[str, Any]:
         """Fallback comprehensive analysis using heuristics"""
 
@@ -1482,7 +1879,7 @@ Focus on actionable insights and specific recommendations. Only respond with the
             quality_score += 10  # Using frameworks
         if total_files > 10:
             quality_score += 5   # Good project size
-        if 'requirements.txt' in str(detailed_files) or 'package.json' in str(detailed_files):
+        if any(f["path"].endswith(("requirements.txt", "package.json")) for f in detailed_files["files"]):
             quality_score += 10  # Has dependency management
 
         recommendations = [
@@ -1511,7 +1908,33 @@ Focus on actionable insights and specific recommendations. Only respond with the
         }
 
     def _heuristic_analysis(self, repo_files: Dict[str, Any]) -> Dict[str, Any]:
-        """Perform heuristic analysis without AI"""
+        """Perform heuristic analysis without AI, memoized per repository snapshot"""
+        fingerprint = self._fingerprint_repo_files(repo_files)
+
+        cached = _heuristic_cache.get(fingerprint)
+        if cached is not None:
+            _heuristic_cache.move_to_end(fingerprint)
+            return copy.deepcopy(cached)
+
+        analysis = self._compute_heuristic_analysis(repo_files)
+        _heuristic_cache[fingerprint] = analysis
+        if len(_heuristic_cache) > _HEURISTIC_CACHE_SIZE:
+            _heuristic_cache.popitem(last=False)
+
+        # Hand out a copy so callers can't mutate the cached result
+        return copy.deepcopy(analysis)
+
+    def _fingerprint_repo_files(self, repo_files: Dict[str, Any]) -> bytes:
+        """Digest of (path, content hash) pairs identifying a repository snapshot"""
+        fingerprint = hashlib.blake2b(digest_size=16)
+        for path, file_info in sorted(repo_files.items()):
+            fingerprint.update(path.encode('utf-8', 'ignore'))
+            content = str(file_info.get("content", "")) if isinstance(file_info, dict) else ""
+            fingerprint.update(hashlib.sha256(content.encode('utf-8', 'ignore')).digest())
+        return fingerprint.digest()
+
+    def _compute_heuristic_analysis(self, repo_files: Dict[str, Any]) -> Dict[str, Any]:
+        """Heuristic analysis over scanned repository files"""
         logger.info("Performing heuristic analysis (no AI)")
 
         analysis = {
@@ -1530,75 +1953,60 @@ Focus on actionable insights and specific recommendations. Only respond with the
             "complexity": "moderate"
         }
 
-        # Detect language based on files
-        if "requirements.txt" in repo_files or "setup.py" in repo_files or "pyproject.toml" in repo_files:
-            analysis["language"] = "python"
-            analysis["build_system"] = "pip"
-            if "requirements.txt" in repo_files:
-                content = repo_files["requirements.txt"].get("content", "")
-                if "fastapi" in content.lower():
-                    analysis["framework"] = "fastapi"
-                elif "django" in content.lower():
-                    analysis["framework"] = "django"
-                elif "flask" in content.lower():
-                    analysis["framework"] = "flask"
-
-        elif "package.json" in repo_files:
-            analysis["language"] = "javascript"
-            analysis["build_system"] = "npm"
-            content = repo_files["package.json"].get("content", "")
-            if "react" in content.lower():
-                analysis["framework"] = "react"
-            elif "vue" in content.lower():
-                analysis["framework"] = "vue"
-            elif "angular" in content.lower():
-                analysis["framework"] = "angular"
-            elif "express" in content.lower():
-                analysis["framework"] = "express"
-            elif "next" in content.lower():
-                analysis["framework"] = "nextjs"
-
-        elif "go.mod" in repo_files:
-            analysis["language"] = "go"
-            analysis["build_system"] = "go"
-
-        elif "Cargo.toml" in repo_files:
-            analysis["language"] = "rust"
-            analysis["build_system"] = "cargo"
+        # Classify every path in a single pass, accumulating feature bits
+        flags = 0
+        for path in repo_files:
+            flags |= _PATH_FLAGS.get(path, 0)
+            if not flags & _HAS_CI and any(needle in path for needle in _CI_NEEDLES):
+                flags |= _HAS_CI
+            if not flags & _HAS_TESTS and _TEST_NEEDLE_RE.search(path):
+                flags |= _HAS_TESTS
+            if "static" in path:
+                flags |= _STATIC_HINT
+            if "serverless" in path or "lambda" in path:
+                flags |= _SERVERLESS_HINT
 
-        elif "pom.xml" in repo_files:
-            analysis["language"] = "java"
-            analysis["build_system"] = "maven"
+        # Detect language based on files
+        manifest_bits = flags & _MANIFEST_BITS
+        if manifest_bits:
+            language, build_system, manifest, priority = _MANIFEST_DISPATCH[manifest_bits & -manifest_bits]
+            analysis["language"] = language
+            analysis["build_system"] = build_system
+            if manifest in repo_files:
+                content = repo_files[manifest].get("content", "")
+                framework = self._match_manifest_framework(content, priority)
+                if framework:
+                    analysis["framework"] = framework
 
         # Check for Docker
-        if "Dockerfile" in repo_files or "docker-compose.yml" in repo_files:
+        if flags & _HAS_DOCKER:
             analysis["has_docker"] = True
             analysis["cloud_ready"] = True
 
-        # Check for CI/CD
-        ci_files = [".github/workflows", ".gitlab-ci.yml", "Jenkinsfile"]
-        for ci_file in ci_files:
-            if any(ci_file in path for path in repo_files.keys()):
-                analysis["has_ci_cd"] = True
-                break
-
-        # Check for tests
-        test_indicators = ["test", "spec", "pytest"]
-        for file_path in repo_files.keys():
-            if any(indicator in file_path.lower() for indicator in test_indicators):
-                analysis["has_tests"] = True
-                break
+        # Check for CI/CD and tests
+        if flags & _HAS_CI:
+            analysis["has_ci_cd"] = True
+        if flags & _HAS_TESTS:
+            analysis["has_tests"] = True
 
         # Set recommended target based on characteristics
-        if analysis["language"] == "javascript" and "static" in str(repo_files):
+        if analysis["language"] == "javascript" and flags & _STATIC_HINT:
             analysis["recommended_target"] = "static"
-        elif "serverless" in str(repo_files) or "lambda" in str(repo_files):
+        elif flags & _SERVERLESS_HINT:
             analysis["recommended_target"] = "serverless"
         else:
             analysis["recommended_target"] = "k8s"
 
         return analysis
 
+    def _match_manifest_framework(self, content: str, priority: Tuple[Tuple[str, str], ...]) -> Optional[str]:
+        """Return the highest-priority framework whose keyword appears in a manifest"""
+        found = {keyword.lower() for keyword in set(_MANIFEST_KEYWORD_RE.findall(content))}
+        for keyword, framework in priority:
+            if keyword in found:
+                return framework
+        return None
+
     def _ai_make_deployment_decisions(self, stack: Dict[str, Any], repo_url: str) -> Dict[str, Any]:
         """Let AI make deployment decisions in auto mode"""
 
@@ -1661,14 +2069,13 @@ Respond with JSON:
     def _parse_ai_decisions(self, decision_text: str) -> Dict[str, Any]:
         """Parse AI deployment decisions"""
         try:
+            # Decode the first JSON object in place; trailing prose is ignored
             start_idx = decision_text.find('{')
-            end_idx = decision_text.rfind('}') + 1
-
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = decision_text[start_idx:end_idx]
-                return json.loads(json_str)
+            if start_idx != -1:
+                decisions, _ = _JSON_DECODER.raw_decode(decision_text, start_idx)
+                return decisions
             else:
-                return json.loads(decision_text)
+                return _JSON_DECODER.decode(decision_text)
 
         except json.JSONDecodeError:
             logger.error("Failed to parse AI deployment decisions")
@@ -1769,164 +2176,19 @@ Only respond with the YAML content, no explanations.
 
     def _python_template_pipeline(self, framework: str, target: str, environments: List[str]) -> str:
         """Python pipeline template"""
-        return f"""name: F-Ops Generated CI/CD Pipeline
-on:
-  push:
-    branches: [main, develop]
-  pull_request:
-    branches: [main]
-
-env:
-  PYTHON_VERSION: '3.9'
-  TARGET_ENVIRONMENT: {target}
-
-jobs:
-  test:
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-      - name: Set up Python
-        uses: actions/setup-python@v4
-        with:
-          python-version: ${{{{ env.PYTHON_VERSION }}}}
-      - name: Install dependencies
-        run: |
-          python -m pip install --upgrade pip
-          pip install -r requirements.txt
-      - name: Run tests
-        run: |
-          python -m pytest --cov=. --cov-report=xml || echo "No tests found"
-      - name: Security scan
-        run: |
-          pip install bandit safety
-          bandit -r . || echo "Security scan completed"
-          safety check || echo "Dependency check completed"
-
-  build:
-    needs: test
-    runs-on: ubuntu-latest
-    if: github.ref == 'refs/heads/main'
-    steps:
-      - uses: actions/checkout@v4
-      - name: Set up Python
-        uses: actions/setup-python@v4
-        with:
-          python-version: ${{{{ env.PYTHON_VERSION }}}}
-      - name: Build application
-        run: |
-          pip install build
-          python -m build || echo "No build step needed"
-
-{self._generate_deployment_jobs(environments, target)}
-"""
+        return _render_python_template_pipeline(framework, target, tuple(environments))
 
     def _javascript_template_pipeline(self, framework: str, target: str, environments: List[str]) -> str:
         """JavaScript pipeline template"""
-        return f"""name: F-Ops Generated CI/CD Pipeline
-on:
-  push:
-    branches: [main, develop]
-  pull_request:
-    branches: [main]
-
-env:
-  NODE_VERSION: '18'
-  TARGET_ENVIRONMENT: {target}
-
-jobs:
-  test:
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-      - name: Set up Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{{{ env.NODE_VERSION }}}}
-          cache: 'npm'
-      - name: Install dependencies
-        run: npm ci
-      - name: Run tests
-        run: npm test || echo "No tests found"
-      - name: Security audit
-        run: npm audit || echo "Security audit completed"
-
-  build:
-    needs: test
-    runs-on: ubuntu-latest
-    if: github.ref == 'refs/heads/main'
-    steps:
-      - uses: actions/checkout@v4
-      - name: Set up Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{{{ env.NODE_VERSION }}}}
-          cache: 'npm'
-      - name: Install dependencies
-        run: npm ci
-      - name: Build application
-        run: npm run build || echo "No build step needed"
-
-{self._generate_deployment_jobs(environments, target)}
-"""
+        return _render_javascript_template_pipeline(framework, target, tuple(environments))
 
     def _generic_template_pipeline(self, language: str, target: str, environments: List[str]) -> str:
         """Generic pipeline template"""
-        return f"""name: F-Ops Generated CI/CD Pipeline
-on:
-  push:
-    branches: [main, develop]
-  pull_request:
-    branches: [main]
-
-env:
-  TARGET_ENVIRONMENT: {target}
-  LANGUAGE: {language}
-
-jobs:
-  test:
-    runs-on: ubuntu-latest
-    steps:
-      - uses: actions/checkout@v4
-      - name: Setup {language} environment
-        run: echo "Setting up {language} environment"
-      - name: Run tests
-        run: echo "Running {language} tests"
-
-  build:
-    needs: test
-    runs-on: ubuntu-latest
-    if: github.ref == 'refs/heads/main'
-    steps:
-      - uses: actions/checkout@v4
-      - name: Build {language} application
-        run: echo "Building {language} application"
-
-{self._generate_deployment_jobs(environments, target)}
-"""
+        return _render_generic_template_pipeline(language, target, tuple(environments))
 
     def _generate_deployment_jobs(self, environments: List[str], target: str) -> str:
         """Generate deployment jobs for each environment"""
-        jobs = []
-
-        for env in environments:
-            condition = "github.ref == 'refs/heads/main'" if env == 'prod' else "true"
-
-            job = f"""
-  deploy-{env}:
-    needs: build
-    runs-on: ubuntu-latest
-    if: {condition}
-    environment: {env}
-    steps:
-      - uses: actions/checkout@v4
-      - name: Deploy to {env} ({target})
-        run: |
-          echo "Deploying to {env} environment using {target}"
-          # Add actual deployment commands here"""
-
-            jobs.append(job)
-
-        return "\n".join(jobs)
+        return _render_deployment_jobs(tuple(environments), target)
 
     def _fallback_analysis(self, repo_url: str) -> Dict[str, Any]:
         """Fallback analysis when AI fails"""
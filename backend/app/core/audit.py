@@ -1,7 +1,16 @@
+import atexit
+import hashlib
 import json
+import os
+import orjson
+import queue
+import secrets
+import struct
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 from enum import Enum
 
@@ -46,19 +55,154 @@ class AuditAction(Enum):
     AUTHENTICATION_SUCCESS = "auth.success"
     AUTHENTICATION_FAILED = "auth.failed"
 
+# Compact numeric ids for actions in the per-day index (0 is reserved)
+_ACTION_IDS = {action.value: idx for idx, action in enumerate(AuditAction, 1)}
+
+# Per-day index record: action id (u8), user id (u32), resource id (u32), JSONL byte offset (u64)
+_INDEX_RECORD = struct.Struct("<BIIQ")
+
+def _name_id(name: Optional[str]) -> int:
+    """Stable 32-bit id for a user/resource name (0 is reserved for none)
+
+    Derived from the name alone so every logger instance and worker agrees without
+    a shared map; collisions only widen the candidate set, which queries re-filter.
+    """
+    if not name:
+        return 0
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=4).digest(), "little") or 1
+
 class AuditLogger:
     def __init__(self, log_dir: str = "./audit_logs"):
         """Initialize audit logger with JSONL file storage"""
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True, parents=True)
-        self.current_log = self._get_current_log_file()
+        now = datetime.now()
+        self.current_log = self._get_current_log_file(now)
+        self._current_date_ordinal = now.toordinal()
+        self._fd = None
+        self._idx_fd = None
+        self._fd_path = None
         logger.info(f"Audit logger initialized with log file: {self.current_log}")
     
-    def _get_current_log_file(self) -> Path:
+    def _open_log(self, log_file: Path) -> int:
+        """Open a long-lived append-only descriptor for the given log file"""
+        return os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    
+    def _index_path(self, log_file: Path) -> Path:
+        """Path of the binary index that accompanies a day's JSONL log"""
+        return log_file.with_suffix(".idx")
+    
+    def _ensure_index(self, log_file: Path):
+        """Index log entries the index doesn't cover yet: a log with no index, or a tail left by a crash"""
+        if not log_file.exists():
+            return
+        index_file = self._index_path(log_file)
+        
+        # Resume after the last indexed line; a trailing partial record from an interrupted write is dropped
+        last_indexed = None
+        if index_file.exists():
+            size = index_file.stat().st_size
+            usable = size - size % _INDEX_RECORD.size
+            if usable != size:
+                os.truncate(index_file, usable)
+            if usable:
+                with open(index_file, 'rb') as f:
+                    f.seek(usable - _INDEX_RECORD.size)
+                    last_indexed = _INDEX_RECORD.unpack(f.read(_INDEX_RECORD.size))[3]
+        
+        records = []
+        with open(log_file, 'rb') as f:
+            offset = 0
+            if last_indexed is not None:
+                # Skip past the last line the index already covers
+                f.seek(last_indexed)
+                offset = last_indexed + len(f.readline())
+            for line in f:
+                if line.strip():
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        entry = {}
+                    action_id = _ACTION_IDS.get(entry.get("action"))
+                    if action_id:
+                        records.append(_INDEX_RECORD.pack(
+                            action_id,
+                            _name_id(entry.get("user")),
+                            _name_id(entry.get("resource")),
+                            offset
+                        ))
+                offset += len(line)
+        
+        if records or not index_file.exists():
+            with open(index_file, 'ab') as f:
+                f.write(b"".join(records))
+    
+    def _append(self, log_file: Path, records: List[Tuple[bytes, Tuple[int, int, int]]]):
+        """Append encoded entries to a log file with a single write syscall and index them"""
+        if self._fd is None or self._fd_path != log_file:
+            self._close_files()
+            self._ensure_index(log_file)
+            self._fd = self._open_log(log_file)
+            self._idx_fd = self._open_log(self._index_path(log_file))
+            self._fd_path = log_file
+        
+        payloads = [payload for payload, _ in records]
+        if len(payloads) == 1:
+            os.write(self._fd, payloads[0])
+        elif hasattr(os, "writev"):
+            os.writev(self._fd, payloads)
+        else:
+            os.write(self._fd, b"".join(payloads))
+        
+        # With O_APPEND the file position now sits at the end of our write
+        offset = os.lseek(self._fd, 0, os.SEEK_CUR) - sum(len(payload) for payload in payloads)
+        index_records = []
+        for payload, (action_id, user_id, resource_id) in records:
+            index_records.append(_INDEX_RECORD.pack(action_id, user_id, resource_id, offset))
+            offset += len(payload)
+        os.write(self._idx_fd, b"".join(index_records))
+    
+    def _write(self, payload: bytes, index_key: Tuple[int, int, int]):
+        """Persist one encoded entry to the current log file"""
+        self._append(self.current_log, [(payload, index_key)])
+    
+    def close(self):
+        """Close the current log and index file descriptors"""
+        self._close_files()
+    
+    def _close_files(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._idx_fd is not None:
+            os.close(self._idx_fd)
+            self._idx_fd = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def _get_current_log_file(self, now: Optional[datetime] = None) -> Path:
         """Get the current log file path based on date"""
-        date_str = datetime.now().strftime("%Y%m%d")
+        date_str = (now or datetime.now()).strftime("%Y%m%d")
         return self.log_dir / f"audit_{date_str}.jsonl"
     
+    def _rotate_if_needed(self, now: datetime):
+        """Switch to a new log file when the day changes"""
+        # The ordinal compare avoids formatting a date string on every call
+        date_ordinal = now.toordinal()
+        if date_ordinal != self._current_date_ordinal:
+            self._current_date_ordinal = date_ordinal
+            self.current_log = self._get_current_log_file(now)
+            logger.info(f"Rotating to new audit log file: {self.current_log}")
+    
+    def flush(self):
+        """Make sure every logged entry has reached the log file"""
+        # Writes are synchronous here; buffered subclasses override this
+        pass
+    
     def log_action(self, 
                    action: AuditAction, 
                    user: str, 
@@ -66,10 +210,11 @@ class AuditLogger:
                    resource: Optional[str] = None,
                    metadata: Optional[Dict[str, Any]] = None) -> str:
         """Log an audit action to JSONL file"""
-        timestamp = datetime.now().isoformat()
+        now = datetime.now()
+        timestamp = now.isoformat()
         
         entry = {
-            "id": self._generate_audit_id(timestamp),
+            "id": self._generate_audit_id(),
             "timestamp": timestamp,
             "action": action.value,
             "user": user,
@@ -78,31 +223,26 @@ class AuditLogger:
             "metadata": metadata or {}
         }
         
-        # Check if we need to rotate to a new file (new day)
-        current_file = self._get_current_log_file()
-        if current_file != self.current_log:
-            self.current_log = current_file
-            logger.info(f"Rotating to new audit log file: {self.current_log}")
+        self._rotate_if_needed(now)
         
-        # Write to JSONL file
+        # Write to JSONL file; O_APPEND keeps each single write atomic
         try:
-            with open(self.current_log, 'a') as f:
-                f.write(json.dumps(entry) + '\n')
+            index_key = (
+                _ACTION_IDS[action.value],
+                _name_id(user),
+                _name_id(resource)
+            )
+            self._write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE), index_key)
             logger.debug(f"Logged audit action: {action.value} by {user}")
             return entry["id"]
         except Exception as e:
             logger.error(f"Failed to write audit log: {e}")
             raise
     
-    def _generate_audit_id(self, timestamp: str) -> str:
+    def _generate_audit_id(self) -> str:
         """Generate a unique audit entry ID"""
-        import hashlib
-        import random
-        
-        # Combine timestamp with random value for uniqueness
-        random_part = str(random.randint(1000, 9999))
-        content = f"{timestamp}_{random_part}"
-        return hashlib.sha256(content.encode()).hexdigest()[:12]
+        # 48 random bits, same 12-hex-char shape as the old truncated hash
+        return secrets.token_hex(6)
     
     def get_audit_trail(self, 
                        start_date: Optional[datetime] = None,
@@ -112,51 +252,93 @@ class AuditLogger:
                        resource: Optional[str] = None,
                        limit: int = 100) -> List[Dict[str, Any]]:
         """Query audit logs with filters"""
+        self.flush()
         entries = []
         
         # Determine which log files to read
         log_files = self._get_log_files_in_range(start_date, end_date)
         
-        for log_file in log_files:
-            if not log_file.exists():
-                continue
-            
+        # Field filters can be answered from the per-day index instead of a full scan
+        index_filter = None
+        target_action = action.value if action else None
+        
+        # ISO-8601 timestamps sort lexicographically, so bounds can be compared as strings
+        start_s = start_date.isoformat() if start_date else None
+        end_s = end_date.isoformat() if end_date else None
+        if action or user or resource:
+            index_filter = (
+                _ACTION_IDS[target_action] if action else None,
+                _name_id(user) if user else None,
+                _name_id(resource) if resource else None
+            )
+        
+        # Newest day first, newest line first: results come out already sorted
+        # (newest first) and we can stop as soon as the limit is reached
+        for log_file in reversed(log_files):
             try:
-                with open(log_file, 'r') as f:
-                    for line in f:
-                        if not line.strip():
-                            continue
-                        
-                        entry = json.loads(line)
-                        
-                        # Apply filters
-                        if action and entry.get('action') != action.value:
-                            continue
-                        if user and entry.get('user') != user:
-                            continue
-                        if resource and entry.get('resource') != resource:
-                            continue
-                        
-                        # Check date range
-                        entry_time = datetime.fromisoformat(entry['timestamp'])
-                        if start_date and entry_time < start_date:
-                            continue
-                        if end_date and entry_time > end_date:
-                            continue
-                        
-                        entries.append(entry)
-                        
-                        if len(entries) >= limit:
-                            return entries
+                for line in reversed(self._read_log_lines(log_file, index_filter)):
+                    if not line.strip():
+                        continue
+                    
+                    entry = orjson.loads(line)
+                    
+                    # Apply filters
+                    if target_action and entry.get('action') != target_action:
+                        continue
+                    if user and entry.get('user') != user:
+                        continue
+                    if resource and entry.get('resource') != resource:
+                        continue
+                    
+                    # Check date range
+                    ts = entry['timestamp']
+                    if start_s and ts < start_s:
+                        continue
+                    if end_s and ts > end_s:
+                        continue
+                    
+                    entries.append(entry)
+                    
+                    if len(entries) >= limit:
+                        return entries
             
             except Exception as e:
                 logger.error(f"Error reading audit log {log_file}: {e}")
                 continue
         
-        # Sort by timestamp (newest first)
-        entries.sort(key=lambda x: x['timestamp'], reverse=True)
+        return entries
+    
+    def _read_log_lines(self,
+                        log_file: Path,
+                        index_filter: Optional[Tuple[Optional[int], Optional[int], Optional[int]]]) -> List[bytes]:
+        """Return candidate JSONL lines, using the day's index to seek straight to matches when possible"""
+        index_file = self._index_path(log_file)
+        if index_filter is None or not index_file.exists():
+            with open(log_file, 'rb') as f:
+                return f.read().split(b'\n')
+        
+        action_id, user_id, resource_id = index_filter
+        with open(index_file, 'rb') as f:
+            index_data = f.read()
+        
+        # Ignore a trailing partial record from an interrupted write
+        usable = len(index_data) - len(index_data) % _INDEX_RECORD.size
+        # Deduplicated and in file order: workers append to the same index, and a catch-up can
+        # index a line just before the worker that wrote it records it too
+        offsets = sorted({
+            offset
+            for rec_action, rec_user, rec_resource, offset in _INDEX_RECORD.iter_unpack(index_data[:usable])
+            if (action_id is None or rec_action == action_id)
+            and (user_id is None or rec_user == user_id)
+            and (resource_id is None or rec_resource == resource_id)
+        })
         
-        return entries[:limit]
+        lines = []
+        with open(log_file, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                lines.append(f.readline())
+        return lines
     
     def _get_log_files_in_range(self, 
                                 start_date: Optional[datetime],
@@ -167,13 +349,17 @@ class AuditLogger:
         if not end_date:
             end_date = datetime.now()
         
+        # List the directory once rather than probing a path per day
+        existing = {p.name: p for p in self.log_dir.glob("audit_*.jsonl")}
+        
         log_files = []
         current_date = start_date
         
         while current_date <= end_date:
             date_str = current_date.strftime("%Y%m%d")
-            log_file = self.log_dir / f"audit_{date_str}.jsonl"
-            log_files.append(log_file)
+            log_file = existing.get(f"audit_{date_str}.jsonl")
+            if log_file is not None:
+                log_files.append(log_file)
             current_date += timedelta(days=1)
         
         return log_files
@@ -235,4 +421,86 @@ class AuditLogger:
         
         return stats
 
+
+class AsyncAuditLogger(AuditLogger):
+    """AuditLogger that hands writes to a background thread and flushes them in batches"""
+    
+    _STOP = object()
+    
+    def __init__(self,
+                 log_dir: str = "./audit_logs",
+                 max_queue: int = 10000,
+                 batch_size: int = 64,
+                 flush_interval: float = 0.1):
+        super().__init__(log_dir)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._writer = threading.Thread(target=self._drain, name="audit-writer", daemon=True)
+        self._writer.start()
+        # The writer is a daemon thread; drain whatever is still queued when the process exits
+        atexit.register(self.close)
+    
+    def _write(self, payload: bytes, index_key: Tuple[int, int, int]):
+        """Queue an encoded entry for the writer thread"""
+        self._queue.put((self.current_log, payload, index_key))
+    
+    def _drain(self):
+        """Writer loop: block for one entry, then batch until batch_size entries or flush_interval elapses"""
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                self._queue.task_done()
+                return
+            
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            self._flush_batch(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+    
+    def _flush_batch(self, batch: List[Tuple[Path, bytes, Tuple[int, int, int]]]):
+        """Write a batch, grouping consecutive entries that target the same day's file"""
+        start = 0
+        while start < len(batch):
+            log_file = batch[start][0]
+            end = start
+            while end < len(batch) and batch[end][0] == log_file:
+                end += 1
+            try:
+                self._append(log_file, [(payload, index_key) for _, payload, index_key in batch[start:end]])
+            except Exception as e:
+                logger.error(f"Failed to write {end - start} audit entries: {e}")
+            start = end
+    
+    def flush(self):
+        """Block until the writer thread has written everything queued so far"""
+        writer = getattr(self, "_writer", None)
+        if writer is not None and writer.is_alive():
+            self._queue.join()
+    
+    def close(self):
+        """Flush queued entries, stop the writer thread and close the log file"""
+        writer = getattr(self, "_writer", None)
+        if writer is not None and writer.is_alive():
+            self._queue.put(self._STOP)
+            writer.join()
+        super().close()
+
 from datetime import timedelta
\ No newline at end of file
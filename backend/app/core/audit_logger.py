@@ -1,25 +1,26 @@
-import json
+import orjson
 from datetime import datetime
-from pathlib import Path
 from typing import Dict, Any, List
 from app.config import settings
+from app.core.audit import AsyncAuditLogger
 import logging
 
 logger = logging.getLogger(__name__)
 
-class AuditLogger:
+# Operations carry no AuditAction, user or resource, so they never match an index filter
+_OPERATION_INDEX_KEY = (0, 0, 0)
+
+class AuditLogger(AsyncAuditLogger):
     """JSONL-based immutable audit logging for F-Ops operations"""
 
     def __init__(self, log_dir: str = None):
-        self.log_dir = Path(log_dir or settings.AUDIT_LOG_DIR)
-        self.log_dir.mkdir(exist_ok=True)
-        self.current_log = self.log_dir / f"audit_{datetime.now():%Y%m%d}.jsonl"
-        logger.info(f"Audit logger initialized: {self.current_log}")
+        super().__init__(log_dir or settings.AUDIT_LOG_DIR)
 
     def log_operation(self, operation: Dict[str, Any]):
         """Log all operations immutably"""
+        now = datetime.now()
         entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "operation_type": operation.get("type"),
             "agent": operation.get("agent"),
             "inputs": operation.get("inputs"),
@@ -30,8 +31,9 @@ class AuditLogger:
             "status": operation.get("status", "completed")
         }
 
-        with open(self.current_log, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
+        # Queued for the shared writer thread, which writes once per batch
+        self._rotate_if_needed(now)
+        self._write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE), _OPERATION_INDEX_KEY)
 
         logger.info(f"Operation logged: {operation.get('type')} by {operation.get('agent')}")
 
@@ -69,6 +71,7 @@ class AuditLogger:
         """Get statistics for a specific day"""
         target_date = date or datetime.now().strftime("%Y%m%d")
         log_file = self.log_dir / f"audit_{target_date}.jsonl"
+        self.flush()
 
         if not log_file.exists():
             return {"date": target_date, "total_operations": 0}
@@ -80,15 +83,19 @@ class AuditLogger:
             "by_agent": {}
         }
 
-        with open(log_file, 'r') as f:
-            for line in f:
-                entry = json.loads(line)
-                stats["total_operations"] += 1
+        with open(log_file, 'rb') as f:
+            data = f.read()
+
+        for line in data.split(b'\n'):
+            if not line:
+                continue
+            entry = orjson.loads(line)
+            stats["total_operations"] += 1
 
-                op_type = entry.get("operation_type", "unknown")
-                agent = entry.get("agent", "unknown")
+            op_type = entry.get("operation_type", "unknown")
+            agent = entry.get("agent", "unknown")
 
-                stats["by_type"][op_type] = stats["by_type"].get(op_type, 0) + 1
-                stats["by_agent"][agent] = stats["by_agent"].get(agent, 0) + 1
+            stats["by_type"][op_type] = stats["by_type"].get(op_type, 0) + 1
+            stats["by_agent"][agent] = stats["by_agent"].get(agent, 0) + 1
 
         return stats
\ No newline at end of file
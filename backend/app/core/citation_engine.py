@@ -23,7 +23,7 @@ class CitationEngine:
         cited_content = f"{generated_content}\n\n# Citations\n" + "\n".join(citations)
 
         # Track usage
-        content_hash = hashlib.md5(generated_content.encode()).hexdigest()
+        content_hash = hashlib.blake2b(generated_content.encode("utf-8", "ignore"), digest_size=16).hexdigest()
         self.track_usage(content_hash, [s['citation'] for s in kb_sources])
 
         return cited_content
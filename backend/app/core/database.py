@@ -1,16 +1,40 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, JSON, Boolean, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, JSON, Boolean, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from datetime import datetime
 from app.config import settings
 
 Base = declarative_base()
 
-# Create engine
-engine = create_engine(
-    settings.SQLITE_URL,
-    connect_args={"check_same_thread": False}  # SQLite specific
-)
+# Create engine; in-memory databases must share one connection, file databases
+# get a real pool so WAL readers on different worker threads run in parallel
+if ":memory:" in settings.SQLITE_URL or settings.SQLITE_URL.rstrip("/") == "sqlite:":
+    engine = create_engine(
+        settings.SQLITE_URL,
+        connect_args={"check_same_thread": False},  # SQLite specific
+        poolclass=StaticPool
+    )
+else:
+    engine = create_engine(
+        settings.SQLITE_URL,
+        connect_args={"check_same_thread": False, "timeout": 30},  # SQLite specific
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True
+    )
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    """WAL journaling with relaxed fsync and larger in-memory caches for every new connection"""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.execute("PRAGMA cache_size=-65536")
+    cur.close()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
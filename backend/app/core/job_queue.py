@@ -0,0 +1,123 @@
+"""
+Background job queue for F-Ops - Runs long agent calls off the request path with SQLite-backed job state
+"""
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs are kept this long for polling, then purged on the next submit
+_FINISHED_JOB_TTL = 3600
+
+def _process_alive(pid: Optional[int]) -> bool:
+    """Whether a worker process with this pid is still running on this host"""
+    if not pid or pid == os.getpid():
+        # This process is only starting its queue, so none of its own jobs can be live
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobQueue:
+    """Runs long agent calls off the request path; job state lives in SQLite so any worker process can answer a poll"""
+
+    def __init__(self, db_path: str, max_workers: int = 4):
+        path = Path(db_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs("
+            "id TEXT PRIMARY KEY, kind TEXT, status TEXT, result TEXT, error TEXT, "
+            "created_at REAL, finished_at REAL, owner_pid INTEGER)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "owner_pid" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+        self._conn.commit()
+        self._fail_interrupted_jobs()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fops-job")
+
+    def _fail_interrupted_jobs(self):
+        """Finish jobs left queued/running by a worker process that has since exited"""
+        rows = self._conn.execute(
+            "SELECT id, owner_pid FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall()
+        now = time.time()
+        orphaned = [(now, job_id) for job_id, owner_pid in rows if not _process_alive(owner_pid)]
+        if not orphaned:
+            return
+        self._conn.executemany(
+            "UPDATE jobs SET status = 'failed', error = 'interrupted', finished_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            orphaned
+        )
+        self._conn.commit()
+        logger.warning(f"Marked {len(orphaned)} interrupted job(s) as failed")
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._conn.commit()
+        return rows
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args: Any) -> str:
+        """Queue fn(*args) and return its job id"""
+        job_id = secrets.token_hex(8)
+        now = time.time()
+        self._execute("DELETE FROM jobs WHERE finished_at < ?", (now - _FINISHED_JOB_TTL,))
+        self._execute(
+            "INSERT INTO jobs(id, kind, status, created_at, owner_pid) VALUES (?, ?, 'queued', ?, ?)",
+            (job_id, kind, now, os.getpid())
+        )
+        self._executor.submit(self._run, job_id, kind, fn, args)
+        return job_id
+
+    def _run(self, job_id: str, kind: str, fn: Callable[..., Any], args: tuple):
+        self._execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job_id,))
+        try:
+            result = json.dumps(fn(*args), default=str)
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            self._execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (str(e), time.time(), job_id)
+            )
+            return
+        self._execute(
+            "UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ? WHERE id = ?",
+            (result, time.time(), job_id)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status with its result or error, or None if unknown or expired"""
+        rows = self._execute("SELECT kind, status, result, error FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        kind, status, result, error = rows[0]
+        job = {"job_id": job_id, "kind": kind, "status": status}
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def shutdown(self):
+        """Stop accepting work and wait for running jobs to record their outcome"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
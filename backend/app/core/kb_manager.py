@@ -1,11 +1,21 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Collection key -> Chroma collection name and metadata
+_COLLECTION_SPECS = {
+    'pipelines': {'name': "kb.pipelines", 'metadata': {"description": "CI/CD pipeline templates"}},
+    'iac': {'name': "kb.iac", 'metadata': {"description": "Infrastructure as Code"}},
+    'docs': {'name': "kb.docs", 'metadata': {"description": "Documentation and runbooks"}},
+    'slo': {'name': "kb.slo", 'metadata': {"description": "SLO definitions"}},
+    'incidents': {'name': "kb.incidents", 'metadata': {"description": "Incident patterns"}},
+}
+
 class KnowledgeBaseManager:
     """Knowledge Base Manager for F-Ops with 5 core collections"""
 
@@ -23,28 +33,13 @@ class KnowledgeBaseManager:
 
     def init_collections(self):
         """Initialize the 5 core collections"""
-        self.collections = {
-            'pipelines': self.client.get_or_create_collection(
-                name="kb.pipelines",
-                metadata={"description": "CI/CD pipeline templates"}
-            ),
-            'iac': self.client.get_or_create_collection(
-                name="kb.iac",
-                metadata={"description": "Infrastructure as Code"}
-            ),
-            'docs': self.client.get_or_create_collection(
-                name="kb.docs",
-                metadata={"description": "Documentation and runbooks"}
-            ),
-            'slo': self.client.get_or_create_collection(
-                name="kb.slo",
-                metadata={"description": "SLO definitions"}
-            ),
-            'incidents': self.client.get_or_create_collection(
-                name="kb.incidents",
-                metadata={"description": "Incident patterns"}
-            )
-        }
+        # get_or_create_collection round-trips to Chroma's metadata store; do all five at once
+        with ThreadPoolExecutor(max_workers=len(_COLLECTION_SPECS)) as executor:
+            futures = {
+                name: executor.submit(self.client.get_or_create_collection, name=spec['name'], metadata=spec['metadata'])
+                for name, spec in _COLLECTION_SPECS.items()
+            }
+        self.collections = {name: future.result() for name, future in futures.items()}
         logger.info(f"Initialized {len(self.collections)} KB collections")
 
     def search(self, collection: str, query: str, k: int = 5) -> List[Dict[str, Any]]:
@@ -81,6 +76,15 @@ class KnowledgeBaseManager:
         )
         logger.info(f"Added document to {collection} collection")
 
+    def ping(self) -> bool:
+        """Cheap liveness probe of the Chroma client"""
+        try:
+            self.client.heartbeat()
+            return True
+        except Exception as e:
+            logger.warning(f"Chroma heartbeat failed: {e}")
+            return False
+
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics for all collections"""
         stats = {}
@@ -1,15 +1,184 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from app.config import settings
 import logging
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.text_splitter import Language, RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
+import asyncio
+import copy
 import hashlib
+import httpx
 import json
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+import numpy as np
+from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Collection key -> Chroma collection name and metadata
+_COLLECTION_SPECS = {
+    'docs': {'name': "kb_docs", 'metadata': {"description": "Documentation and guides"}},
+    'pipelines': {'name': "kb_pipelines", 'metadata': {"description": "CI/CD pipeline configurations"}},
+    'iac': {'name': "kb_iac", 'metadata': {"description": "Infrastructure as Code templates"}},
+    'incidents': {'name': "kb_incidents", 'metadata': {"description": "Incident reports and resolutions"}},
+    'prompts': {'name': "kb_prompts", 'metadata': {"description": "Prompt templates for DevOps tasks"}},
+}
+
+# OpenAI accepts at most 2048 inputs per embeddings request
+_EMBED_BATCH_SIZE = 2048
+
+# Keep IN (...) lookups well under SQLite's bound-parameter limit
+_CACHE_LOOKUP_BATCH = 500
+
+# Embeddings are kept at float16 precision: cache blobs are half the size and cosine
+# ranking is unaffected. Chroma has no fp16 storage, so it gets fp16-rounded fp32 values.
+_EMBEDDING_DTYPE = np.float16
+_EMBEDDING_CACHE_TAG = ":fp16"
+
+# Query embeddings shared by every KnowledgeBase, keyed by sha256(query + model) so long
+# queries don't pin their text in memory; vectors are float32 (~6 KB each at 1536 dims)
+_QUERY_EMBEDDING_CACHE_MAXSIZE = 10_000
+_query_embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_query_embedding_cache_lock = threading.Lock()
+
+# Search result cache: a repeat of a recent query (same text after case/whitespace folding) reuses
+# its results. Keyed on text, not embedding distance: ada-002 similarities crowd into ~0.7-1.0, so
+# distinct queries such as "deploy to staging"/"deploy to production" sit too close to tell apart
+_SEARCH_CACHE_TTL = 600
+_SEARCH_CACHE_MAXSIZE = 256
+
+# Chunk separators per document language, tried in order
+_DEFAULT_SEPS = ["\n\n", "\n", " ", ""]
+_YAML_SEPS = ["\n---", "\n\n", "\n- ", "\n", " ", ""]
+_LANG_TO_SEPS = {
+    "yaml": _YAML_SEPS, "yml": _YAML_SEPS,
+}
+
+# Languages with syntax-aware separators in langchain; chunks keep functions and classes intact
+_LANG_TO_LANGUAGE = {
+    "python": Language.PYTHON, "py": Language.PYTHON,
+    "javascript": Language.JS, "js": Language.JS,
+    "typescript": Language.TS, "ts": Language.TS,
+    "markdown": Language.MARKDOWN, "md": Language.MARKDOWN,
+    "html": Language.HTML,
+}
+
+@lru_cache(maxsize=16)
+def _get_text_splitter(language: Optional[str] = None, chunk_size: int = 1000,
+                       chunk_overlap: int = 100) -> RecursiveCharacterTextSplitter:
+    """Shared text splitter per language and chunk configuration; split_text keeps no per-call state"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=_LANG_TO_SEPS.get(language, _DEFAULT_SEPS)
+    )
+
+@lru_cache(maxsize=16)
+def _get_code_splitter(language: str) -> RecursiveCharacterTextSplitter:
+    """Shared syntax-aware splitter for a source language"""
+    return RecursiveCharacterTextSplitter.from_language(
+        _LANG_TO_LANGUAGE[language],
+        chunk_size=1500,
+        chunk_overlap=150
+    )
+
+def _merge_tiny(content: str, chunks: List[str], min_chars: int = 400,
+                max_chars: int = 1100) -> List[str]:
+    """Merge undersized chunks into their neighbours while the result stays within max_chars"""
+    # Chunks are slices of content; a merge takes the original span from the first chunk's start
+    # to the last one's end, so splitter overlap appears once and real separators are kept
+    merged: List[Tuple[int, int]] = []
+    cursor = 0
+    for chunk in chunks:
+        start = content.find(chunk, cursor)
+        if start < 0:
+            # Not a verbatim slice of content, so spans can't be recovered; leave the chunks unmerged
+            return list(chunks)
+        end = start + len(chunk)
+        cursor = start + 1
+        if merged:
+            prev_start, prev_end = merged[-1]
+            if ((prev_end - prev_start < min_chars or len(chunk) < min_chars)
+                    and max(end, prev_end) - prev_start <= max_chars):
+                merged[-1] = (prev_start, max(end, prev_end))
+                continue
+        merged.append((start, end))
+    return [content[start:end] for start, end in merged]
+
+@lru_cache(maxsize=1)
+def _get_shared_http_client() -> httpx.Client:
+    """Keep-alive HTTP pool shared by every embeddings client"""
+    return httpx.Client(
+        timeout=60.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+    )
+
+@lru_cache(maxsize=1)
+def _get_embeddings_client() -> OpenAIEmbeddings:
+    """Process-wide OpenAI embeddings client shared by every KnowledgeBase"""
+    return OpenAIEmbeddings(
+        openai_api_key=settings.OPENAI_API_KEY,
+        http_client=_get_shared_http_client(),
+        max_retries=3,
+        chunk_size=_EMBED_BATCH_SIZE
+    )
+
+class _SearchResultCache:
+    """Per-collection search results keyed by normalized query text.
+
+    Only this instance's own writes invalidate entries: documents ingested through
+    KnowledgeBaseManager or another worker process stay invisible to cached queries
+    for up to the TTL (10 minutes).
+    """
+
+    def __init__(self, ttl: float = _SEARCH_CACHE_TTL, maxsize: int = _SEARCH_CACHE_MAXSIZE):
+        self._ttl = ttl
+        self._maxsize = maxsize
+        # (collection, k, normalized query) -> (expiry, results), oldest first
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def get(self, collection: str, k: int, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Copy of the cached results for a fresh repeat of query, or None on a miss"""
+        key = (collection, k, self._normalize(query))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if cached[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            results = cached[1]
+        # Callers may mutate result dicts; hand out copies so the cached entry stays intact
+        return copy.deepcopy(results)
+
+    def put(self, collection: str, k: int, query: str, results: List[Dict[str, Any]]):
+        """Remember results for a query, evicting the oldest entry when full"""
+        key = (collection, k, self._normalize(query))
+        entry = (time.monotonic() + self._ttl, copy.deepcopy(results))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, collection: str):
+        """Drop every cached query for a collection after it changes"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == collection]:
+                del self._entries[key]
+
 class KnowledgeBase:
     def __init__(self, persist_directory: str = None):
         """Initialize the Knowledge Base with Chroma"""
@@ -23,102 +192,276 @@ class KnowledgeBase:
             )
         )
         self.init_collections()
-        self.embeddings = OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY)
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        self._init_legacy_doc_ids(Path(persist_dir) / "doc_id_format.json")
+        # Repeats of a recent query reuse its results instead of another embedding call and ANN scan
+        self._search_cache = _SearchResultCache()
+        self._init_embedding_cache(Path(persist_dir) / "embedding_cache.sqlite")
+        self.text_splitter = _get_text_splitter()
+    
+    @cached_property
+    def embeddings(self) -> OpenAIEmbeddings:
+        """OpenAI embeddings client, created on first use"""
+        return _get_embeddings_client()
+    
+    def _cached_embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing the vector of an identical earlier query"""
+        key = hashlib.sha256((query + self.embeddings.model).encode()).digest()
+        with _query_embedding_cache_lock:
+            vector = _query_embedding_cache.get(key)
+            if vector is not None:
+                _query_embedding_cache.move_to_end(key)
+                return vector.tolist()
+        
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        with _query_embedding_cache_lock:
+            _query_embedding_cache[key] = vector
+            if len(_query_embedding_cache) > _QUERY_EMBEDDING_CACHE_MAXSIZE:
+                _query_embedding_cache.popitem(last=False)
+        return vector.tolist()
+    
+    def _init_legacy_doc_ids(self, marker_path: Path):
+        """Find collections that may still hold documents under the old sha256(JSON) doc ids"""
+        # Recorded once, on the first start with BLAKE2b ids: collections that already had
+        # documents then. Re-adding one of their documents replaces its old-id copy.
+        self._legacy_marker_path = marker_path
+        if marker_path.exists():
+            self._legacy_collections = set(json.loads(marker_path.read_text())['legacy_collections'])
+            return
+        self._legacy_collections = {name for name, coll in self.collections.items() if coll.count()}
+        self._save_legacy_marker()
+    
+    def _save_legacy_marker(self):
+        self._legacy_marker_path.write_text(json.dumps({'legacy_collections': sorted(self._legacy_collections)}))
+    
+    def _drop_legacy_copy(self, collection: str, document: Dict[str, Any]):
+        """Delete a document's chunks stored under its pre-BLAKE2b id, if the collection predates it"""
+        if collection not in self._legacy_collections:
+            return
+        legacy_id = hashlib.sha256(json.dumps(document, sort_keys=True).encode()).hexdigest()[:16]
+        self.delete_document(collection, legacy_id)
+    
+    def _init_embedding_cache(self, cache_path: Path):
+        """Open the on-disk chunk embedding cache, keyed by sha256(chunk + model)"""
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._embedding_cache = sqlite3.connect(str(cache_path), check_same_thread=False)
+        self._embedding_cache.execute("PRAGMA journal_mode=WAL")
+        self._embedding_cache.execute("PRAGMA synchronous=NORMAL")
+        self._embedding_cache.execute("CREATE TABLE IF NOT EXISTS emb_cache(h BLOB PRIMARY KEY, v BLOB)")
+        self._embedding_cache.commit()
+        self._embedding_cache_lock = threading.Lock()
+    
+    def _embed_chunks_cached(self, chunks: List[str]) -> List[List[float]]:
+        """Embed chunks, only sending cache misses to the embeddings API"""
+        hashes, embeddings, misses = self._lookup_embedding_cache(chunks)
+        if misses:
+            miss_chunks = [chunks[i] for i in misses]
+            new_embeddings = []
+            for start in range(0, len(miss_chunks), _EMBED_BATCH_SIZE):
+                new_embeddings.extend(self.embeddings.embed_documents(miss_chunks[start:start + _EMBED_BATCH_SIZE]))
+            self._fill_embedding_cache(hashes, embeddings, misses, new_embeddings)
+        return embeddings
+    
+    async def _aembed_chunks_cached(self, chunks: List[str]) -> List[List[float]]:
+        """Async _embed_chunks_cached: cache misses are embedded as concurrent sub-batches"""
+        hashes, embeddings, misses = await asyncio.to_thread(self._lookup_embedding_cache, chunks)
+        if misses:
+            new_embeddings = await self._embed_concurrent([chunks[i] for i in misses])
+            await asyncio.to_thread(self._fill_embedding_cache, hashes, embeddings, misses, new_embeddings)
+        return embeddings
+    
+    def _lookup_embedding_cache(self, chunks: List[str]) -> Tuple[List[bytes], List[Optional[List[float]]], List[int]]:
+        """Cache keys per chunk, the cached vectors (None for misses) and the indexes of the misses"""
+        model = self.embeddings.model
+        key_suffix = model + _EMBEDDING_CACHE_TAG
+        hashes = [hashlib.sha256((chunk + key_suffix).encode()).digest() for chunk in chunks]
+        
+        cached = {}
+        with self._embedding_cache_lock:
+            for start in range(0, len(hashes), _CACHE_LOOKUP_BATCH):
+                batch = hashes[start:start + _CACHE_LOOKUP_BATCH]
+                rows = self._embedding_cache.execute(
+                    f"SELECT h, v FROM emb_cache WHERE h IN ({','.join('?' * len(batch))})", batch
+                )
+                cached.update(rows)
+        
+        embeddings: List[Optional[List[float]]] = [None] * len(chunks)
+        misses = []
+        for i, h in enumerate(hashes):
+            if h in cached:
+                embeddings[i] = np.frombuffer(cached[h], dtype=_EMBEDDING_DTYPE).astype(np.float32).tolist()
+            else:
+                misses.append(i)
+        
+        logger.debug(f"Embedding cache: {len(chunks) - len(misses)} hits, {len(misses)} misses")
+        return hashes, embeddings, misses
+    
+    def _fill_embedding_cache(self, hashes: List[bytes], embeddings: List[Optional[List[float]]],
+                              misses: List[int], new_embeddings: List[List[float]]):
+        """Quantize freshly embedded misses into embeddings and store them in the cache"""
+        quantized = np.asarray(new_embeddings, dtype=_EMBEDDING_DTYPE)
+        for i, embedding in zip(misses, quantized.astype(np.float32).tolist()):
+            embeddings[i] = embedding
+        
+        with self._embedding_cache_lock:
+            self._embedding_cache.executemany(
+                "INSERT OR IGNORE INTO emb_cache(h, v) VALUES (?, ?)",
+                [(hashes[i], row.tobytes()) for i, row in zip(misses, quantized)]
+            )
+            self._embedding_cache.commit()
     
     def init_collections(self):
         """Initialize Chroma collections for different knowledge types"""
-        self.collections = {
-            'docs': self.client.get_or_create_collection(
-                name="kb_docs",
-                metadata={"description": "Documentation and guides"}
-            ),
-            'pipelines': self.client.get_or_create_collection(
-                name="kb_pipelines",
-                metadata={"description": "CI/CD pipeline configurations"}
-            ),
-            'iac': self.client.get_or_create_collection(
-                name="kb_iac",
-                metadata={"description": "Infrastructure as Code templates"}
-            ),
-            'incidents': self.client.get_or_create_collection(
-                name="kb_incidents",
-                metadata={"description": "Incident reports and resolutions"}
-            ),
-            'prompts': self.client.get_or_create_collection(
-                name="kb_prompts",
-                metadata={"description": "Prompt templates for DevOps tasks"}
-            )
-        }
+        # get_or_create_collection round-trips to Chroma's metadata store; do all five at once
+        with ThreadPoolExecutor(max_workers=len(_COLLECTION_SPECS)) as executor:
+            futures = {
+                name: executor.submit(self.client.get_or_create_collection, name=spec['name'], metadata=spec['metadata'])
+                for name, spec in _COLLECTION_SPECS.items()
+            }
+        self.collections = {name: future.result() for name, future in futures.items()}
         logger.info(f"Initialized {len(self.collections)} knowledge collections")
     
     def add_document(self, collection: str, document: Dict[str, Any]) -> str:
         """Add a document to the specified collection"""
+        # Same write path as batches, so a document is stored identically either way
+        return self.add_documents_batch(collection, [document])[0]
+    
+    def add_documents_batch(self, collection: str, documents: List[Dict[str, Any]]) -> List[str]:
+        """Add several documents to a collection, embedding all of their chunks together"""
         if collection not in self.collections:
             raise ValueError(f"Collection '{collection}' not found")
         
-        # Generate unique ID for the document
-        doc_id = self._generate_doc_id(document)
+        doc_ids, doc_chunks, flat_chunks = self._split_documents(documents)
         
-        # Process content
-        content = document.get('content', '')
-        metadata = document.get('metadata', {})
+        # One embeddings request per sub-batch of cache misses instead of one per document
+        embeddings = None if settings.USE_CHROMA_EMBEDDER else self._embed_chunks_cached(flat_chunks)
         
-        # Split text into chunks
-        chunks = self.text_splitter.split_text(content)
+        self._add_split_documents(collection, documents, doc_ids, doc_chunks, embeddings)
+        logger.info(f"Added {len(documents)} documents to collection '{collection}' ({len(flat_chunks)} chunks)")
+        return doc_ids
+    
+    async def aadd_documents_batch(self, collection: str, documents: List[Dict[str, Any]]) -> List[str]:
+        """Async add_documents_batch that embeds cache misses as concurrent sub-batches"""
+        if collection not in self.collections:
+            raise ValueError(f"Collection '{collection}' not found")
         
-        # Generate embeddings
-        embeddings = self.embeddings.embed_documents(chunks)
+        # Splitting and the Chroma write are blocking; keep them off the event loop
+        doc_ids, doc_chunks, flat_chunks = await asyncio.to_thread(self._split_documents, documents)
+        embeddings = None if settings.USE_CHROMA_EMBEDDER else await self._aembed_chunks_cached(flat_chunks)
         
-        # Add to collection
+        await asyncio.to_thread(self._add_split_documents, collection, documents, doc_ids, doc_chunks, embeddings)
+        logger.info(f"Added {len(documents)} documents to collection '{collection}' ({len(flat_chunks)} chunks)")
+        return doc_ids
+    
+    async def _embed_concurrent(self, chunks: List[str], sub_batch: int = 512,
+                                max_inflight: int = 5) -> List[List[float]]:
+        """Embed chunks as concurrent sub-batches with bounded parallelism, preserving order"""
+        sem = asyncio.Semaphore(max_inflight)
+        
+        async def embed_slice(start: int) -> List[List[float]]:
+            async with sem:
+                # Small jitter so the sub-batches don't hit the rate limiter in lockstep
+                await asyncio.sleep(random.uniform(0, 0.05))
+                return await self.embeddings.aembed_documents(chunks[start:start + sub_batch])
+        
+        results = await asyncio.gather(*(embed_slice(start) for start in range(0, len(chunks), sub_batch)))
+        return [embedding for batch in results for embedding in batch]
+    
+    def _split_documents(self, documents: List[Dict[str, Any]]) -> Tuple[List[str], List[List[str]], List[str]]:
+        """Split documents into chunks, returning ids, per-document chunks and the flattened chunk list"""
+        doc_ids = []
+        doc_chunks = []
+        flat_chunks = []
+        for document in documents:
+            doc_ids.append(self._generate_doc_id(document))
+            chunks = self._split_content(document.get('content', ''), document.get('metadata', {}))
+            doc_chunks.append(chunks)
+            flat_chunks.extend(chunks)
+        return doc_ids, doc_chunks, flat_chunks
+    
+    def _add_split_documents(self, collection: str, documents: List[Dict[str, Any]], doc_ids: List[str],
+                             doc_chunks: List[List[str]], embeddings: Optional[List[List[float]]]):
+        """Write every document's chunks to the collection with a single add"""
+        for document in documents:
+            self._drop_legacy_copy(collection, document)
+        all_metadatas = []
+        all_ids = []
+        for document, doc_id, chunks in zip(documents, doc_ids, doc_chunks):
+            if not chunks:
+                continue
+            all_metadatas.extend(self._chunk_metadatas(document.get('metadata', {}), doc_id, len(chunks)))
+            all_ids.extend(self._chunk_ids(doc_id, len(chunks)))
+        
+        if not all_ids:
+            return
+        
+        # One Chroma write (and one SQLite commit) for the whole batch
         self.collections[collection].add(
-            documents=chunks,
+            documents=[chunk for chunks in doc_chunks for chunk in chunks],
             embeddings=embeddings,
-            metadatas=[{**metadata, 'chunk_index': i} for i in range(len(chunks))],
-            ids=[f"{doc_id}_{i}" for i in range(len(chunks))]
+            metadatas=all_metadatas,
+            ids=all_ids
         )
-        
-        logger.info(f"Added document {doc_id} to collection '{collection}' ({len(chunks)} chunks)")
-        return doc_id
+        self._search_cache.invalidate(collection)
     
     def search(self, collection: str, query: str, k: int = 5, 
-               filter_dict: Optional[Dict] = None) -> List[Dict[str, Any]]:
+               filter_dict: Optional[Dict] = None,
+               query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         """Search for documents in the specified collection"""
         if collection not in self.collections:
             raise ValueError(f"Collection '{collection}' not found")
         
-        # Generate query embedding
-        query_embedding = self.embeddings.embed_query(query)
-        
-        # Perform search
-        results = self.collections[collection].query(
-            query_embeddings=[query_embedding],
-            n_results=k,
-            where=filter_dict
-        )
+        # Perform search; with the Chroma embedder the collection embeds the query itself
+        if query_embedding is None and settings.USE_CHROMA_EMBEDDER:
+            results = self.collections[collection].query(
+                query_texts=[query],
+                n_results=k,
+                where=filter_dict
+            )
+        else:
+            if filter_dict is None:
+                cached = self._search_cache.get(collection, k, query)
+                if cached is not None:
+                    logger.info(f"Search cache hit for query in '{collection}'")
+                    return cached
+            # Generate query embedding unless the caller already has one
+            if query_embedding is None:
+                query_embedding = self._cached_embed_query(query)
+            results = self.collections[collection].query(
+                query_embeddings=[query_embedding],
+                n_results=k,
+                where=filter_dict
+            )
         
         # Format results
-        formatted_results = []
-        for i in range(len(results['documents'][0])):
-            formatted_results.append({
-                'content': results['documents'][0][i],
-                'metadata': results['metadatas'][0][i] if results['metadatas'] else {},
-                'distance': results['distances'][0][i] if results['distances'] else None,
-                'id': results['ids'][0][i] if results['ids'] else None
-            })
+        docs = results['documents'][0]
+        n = len(docs)
+        metas = results['metadatas'][0] if results['metadatas'] else [{} for _ in range(n)]
+        dists = results['distances'][0] if results['distances'] else [None] * n
+        ids = results['ids'][0] if results['ids'] else [None] * n
+        formatted_results = [
+            {'content': doc, 'metadata': meta, 'distance': dist, 'id': doc_id}
+            for doc, meta, dist, doc_id in zip(docs, metas, dists, ids)
+        ]
+        
+        if query_embedding is not None and filter_dict is None:
+            self._search_cache.put(collection, k, query, formatted_results)
         
         logger.info(f"Found {len(formatted_results)} results for query in '{collection}'")
         return formatted_results
     
     def search_all(self, query: str, k: int = 5) -> Dict[str, List[Dict[str, Any]]]:
         """Search across all collections"""
+        # Embed the query once and query every collection concurrently
+        query_embedding = None if settings.USE_CHROMA_EMBEDDER else self._cached_embed_query(query)
+        with ThreadPoolExecutor(max_workers=len(self.collections)) as executor:
+            futures = {
+                collection_name: executor.submit(self.search, collection_name, query, k, None, query_embedding)
+                for collection_name in self.collections
+            }
+        
         all_results = {}
-        for collection_name in self.collections.keys():
-            results = self.search(collection_name, query, k)
+        for collection_name, future in futures.items():
+            results = future.result()
             if results:
                 all_results[collection_name] = results
         return all_results
@@ -141,16 +484,25 @@ class KnowledgeBase:
         if collection not in self.collections:
             raise ValueError(f"Collection '{collection}' not found")
         
-        # Get all chunk IDs for the document
-        results = self.collections[collection].get(
-            where={"$contains": doc_id}
-        )
+        # Chunk ids are f"{doc_id}_{i}", so the first chunk's total_chunks gives every id
+        # without scanning the collection
+        first_chunk = self.collections[collection].get(ids=[f"{doc_id}_0"])
+        if not first_chunk['ids']:
+            return False
+        
+        total_chunks = (first_chunk['metadatas'][0] or {}).get('total_chunks') if first_chunk['metadatas'] else None
+        if total_chunks:
+            chunk_ids = self._chunk_ids(doc_id, total_chunks)
+        else:
+            # Documents added before total_chunks was recorded need a one-off id scan
+            prefix = f"{doc_id}_"
+            all_ids = self.collections[collection].get(include=[])['ids']
+            chunk_ids = [chunk_id for chunk_id in all_ids if chunk_id.startswith(prefix)]
         
-        if results['ids']:
-            self.collections[collection].delete(ids=results['ids'])
-            logger.info(f"Deleted document {doc_id} from collection '{collection}'")
-            return True
-        return False
+        self.collections[collection].delete(ids=chunk_ids)
+        self._search_cache.invalidate(collection)
+        logger.info(f"Deleted document {doc_id} from collection '{collection}'")
+        return True
     
     def get_collection_stats(self, collection: str = None) -> Dict[str, Any]:
         """Get statistics for a collection or all collections"""
@@ -172,11 +524,52 @@ class KnowledgeBase:
         
         return stats
     
+    def _split_content(self, content: str, metadata: Dict[str, Any]) -> List[str]:
+        """Split a document into chunks, folding tiny fragments into their neighbours"""
+        return _merge_tiny(content, self._splitter_for(metadata).split_text(content))
+    
+    def _splitter_for(self, metadata: Dict[str, Any]) -> RecursiveCharacterTextSplitter:
+        """Pick the text splitter for a document from its metadata 'language'"""
+        language = metadata.get('language')
+        if isinstance(language, str):
+            language = language.lower()
+            if language in _LANG_TO_LANGUAGE:
+                return _get_code_splitter(language)
+            if language in _LANG_TO_SEPS:
+                return _get_text_splitter(language)
+        return self.text_splitter
+    
+    def _chunk_metadatas(self, metadata: Dict[str, Any], doc_id: str, total_chunks: int) -> List[Dict[str, Any]]:
+        """Per-chunk metadata: the document's metadata plus chunk bookkeeping"""
+        # Build the shared fields once and copy per chunk rather than re-spreading metadata each time
+        base = dict(metadata)
+        base['doc_id'] = doc_id
+        base['total_chunks'] = total_chunks
+        metadatas = [None] * total_chunks
+        for i in range(total_chunks):
+            chunk_metadata = base.copy()
+            chunk_metadata['chunk_index'] = i
+            metadatas[i] = chunk_metadata
+        return metadatas
+    
+    def _chunk_ids(self, doc_id: str, total_chunks: int) -> List[str]:
+        """Chroma ids for a document's chunks"""
+        prefix = f"{doc_id}_"
+        return [prefix + str(i) for i in range(total_chunks)]
+    
     def _generate_doc_id(self, document: Dict[str, Any]) -> str:
         """Generate a unique ID for a document"""
-        # Use content hash + metadata for unique ID
-        content = json.dumps(document, sort_keys=True)
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
+        # Use content hash + metadata for unique ID; BLAKE2b with an 8-byte digest
+        # yields the same 16 hex chars without hashing a JSON copy of the content
+        content = document.get('content')
+        if not isinstance(content, str):
+            return hashlib.blake2b(json.dumps(document, sort_keys=True).encode(), digest_size=8).hexdigest()
+        
+        rest = {key: value for key, value in document.items() if key != 'content'}
+        digest = hashlib.blake2b(content.encode(), digest_size=8)
+        digest.update(b"\0")
+        digest.update(json.dumps(rest, sort_keys=True).encode())
+        return digest.hexdigest()
     
     def reset_collection(self, collection: str):
         """Reset a specific collection"""
@@ -191,6 +584,10 @@ class KnowledgeBase:
             name=f"kb_{collection}",
             metadata={"description": f"Reset collection for {collection}"}
         )
+        self._search_cache.invalidate(collection)
+        if collection in self._legacy_collections:
+            self._legacy_collections.discard(collection)
+            self._save_legacy_marker()
         logger.info(f"Reset collection '{collection}'")
     
     def reset_all(self):
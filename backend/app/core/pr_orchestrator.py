@@ -1,12 +1,152 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from app.core.audit_logger import AuditLogger
 from app.config import settings
 from mcp_packs.pack_manager import pack_manager
+from functools import lru_cache
+from string import Template
+import itertools
 import logging
+import os
 import re
+import threading
+import time
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
+_GITHUB_REPO_RE = re.compile(r'github\.com/([^/]+/[^/]+)', re.IGNORECASE)
+_GITLAB_PROJECT_RE = re.compile(r'gitlab\.com/([^/]+/[^/]+)', re.IGNORECASE)
+
+# Branch suffixes: process start time, pid (for multi-worker setups) and a counter, kept as separate fields
+_branch_epoch = int(time.time())
+_branch_counter = itertools.count()
+
+# Hostname -> MCP pack name
+_PLATFORMS = {
+    'github.com': 'github',
+    'www.github.com': 'github',
+    'gitlab.com': 'gitlab',
+    'www.gitlab.com': 'gitlab',
+}
+
+# Failed MCP pack initialization (missing/invalid token, platform outage) is retried at most this often
+_PACK_RETRY_BACKOFF = 45
+_pack_retry_at: Dict[str, float] = {}
+_pack_retry_lock = threading.Lock()
+
+# Repository access rarely changes within minutes; shared across orchestrator instances
+_ACCESS_CACHE_TTL = 300
+_ACCESS_CACHE_MAXSIZE = 512
+_access_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_access_cache_lock = threading.Lock()
+
+# Infrastructure PR body, split around the optional Terraform/Helm sections
+_INFRA_BODY_HEAD = Template("""# F-Ops Generated Infrastructure Configuration
+
+This PR adds infrastructure configuration for **$target** deployment generated by F-Ops.
+
+## Configuration Summary
+- **Target Platform**: $target
+- **Environments**: $environments
+- **Domain**: $domain
+
+## Generated Components
+""")
+
+_INFRA_TERRAFORM_SECTION = """
+### 🏗️ Terraform Infrastructure
+- Network modules (VPC, subnets, NAT gateways)
+- Container registry (ECR/ACR)
+- DNS configuration (Route53/Azure DNS, SSL certificates)
+- Secrets management integration
+"""
+
+_INFRA_HELM_SECTION = """
+### ⎈ Helm Chart
+- Kubernetes deployment configuration
+- Service and ingress definitions
+- ConfigMaps and environment-specific values
+- Autoscaling and resource limits
+"""
+
+_INFRA_BODY_TAIL = Template("""
+## Validation Results
+
+### Terraform Plan
+- **Status**: $plan_status
+- **Resources to add**: $add
+- **Resources to change**: $change
+- **Resources to destroy**: $destroy
+
+### Helm Dry-Run
+- **Status**: $helm_status
+- **Lint passed**: $lint
+- **Manifests generated**: $manifests
+
+## Knowledge Base Citations
+$citations
+
+---
+*Generated by F-Ops Infrastructure Agent*
+*Review all changes and plan outputs before merging*
+""")
+
+
+def _detect_platform(url: str) -> Optional[str]:
+    """Map a repository/PR URL to its MCP pack name by hostname"""
+    host = urlsplit(url).hostname
+    if host is None:
+        # Scheme-less URLs such as "github.com/org/repo"
+        host = urlsplit(f"//{url}").hostname
+    return _PLATFORMS.get(host)
+
+
+def _format_citations(citations) -> str:
+    """Format citations for PR body"""
+    if not citations:
+        return "No knowledge base sources referenced."
+
+    return "\n".join(f"{i}. {citation}" for i, citation in enumerate(citations, 1))
+
+
+@lru_cache(maxsize=256)
+def _render_infra_body(target: str,
+                       environments: Tuple[str, ...],
+                       domain: str,
+                       has_terraform: bool,
+                       has_helm: bool,
+                       plan_status: str,
+                       plan_summary: Tuple[int, int, int],
+                       helm_status: str,
+                       helm_lint_passed: bool,
+                       helm_manifest_count: int,
+                       citations: Tuple[str, ...]) -> str:
+    """Render the infrastructure PR body"""
+    add, change, destroy = plan_summary
+    parts = [_INFRA_BODY_HEAD.substitute(
+        target=target,
+        environments=', '.join(environments),
+        domain=domain
+    )]
+
+    if has_terraform:
+        parts.append(_INFRA_TERRAFORM_SECTION)
+
+    if has_helm:
+        parts.append(_INFRA_HELM_SECTION)
+
+    parts.append(_INFRA_BODY_TAIL.substitute(
+        plan_status=plan_status,
+        add=add,
+        change=change,
+        destroy=destroy,
+        helm_status=helm_status,
+        lint='✅' if helm_lint_passed else '❌',
+        manifests=helm_manifest_count,
+        citations=_format_citations(citations)
+    ))
+    return "".join(parts)
+
 class PROrchestrator:
     """Orchestrates PR/MR creation across GitHub and GitLab with dry-run artifacts"""
 
@@ -14,16 +154,41 @@ class PROrchestrator:
         self.audit_logger = audit_logger
 
         # Initialize MCP packs
-        pack_manager.initialize_github_pack(
-            token=settings.MCP_GITHUB_TOKEN,
-            allowed_repos=settings.ALLOWED_REPOS,
-            audit_logger=audit_logger
-        )
-        pack_manager.initialize_gitlab_pack(
-            token=settings.MCP_GITLAB_TOKEN,
+        self._ensure_pack('github')
+        self._ensure_pack('gitlab')
+
+    def _ensure_pack(self, platform: Optional[str]) -> bool:
+        """Connect the platform's MCP pack if it isn't yet (no-op once initialized)"""
+        initializers = {
+            'github': (pack_manager.initialize_github_pack, settings.MCP_GITHUB_TOKEN),
+            'gitlab': (pack_manager.initialize_gitlab_pack, settings.MCP_GITLAB_TOKEN),
+        }
+        if platform not in initializers:
+            return False
+        pack = pack_manager.get_pack(platform)
+        if pack is not None and pack.initialized:
+            return True
+
+        # A missing or rejected token fails every attempt; don't pay the auth handshake per request
+        now = time.monotonic()
+        with _pack_retry_lock:
+            if _pack_retry_at.get(platform, 0.0) > now:
+                return False
+            _pack_retry_at[platform] = now + _PACK_RETRY_BACKOFF
+
+        initialize, token = initializers[platform]
+        initialize(
+            token=token,
             allowed_repos=settings.ALLOWED_REPOS,
-            audit_logger=audit_logger
+            audit_logger=self.audit_logger
         )
+        pack = pack_manager.get_pack(platform)
+        if pack is not None and pack.initialized:
+            with _pack_retry_lock:
+                _pack_retry_at.pop(platform, None)
+            return True
+        logger.warning(f"MCP pack '{platform}' not initialized; retrying in {_PACK_RETRY_BACKOFF}s")
+        return False
 
     def create_pr_with_artifacts(self,
                                 repo_url: str,
@@ -50,13 +215,16 @@ class PROrchestrator:
             branch_name = f"fops-generated-{self._generate_branch_suffix()}"
 
         try:
-            if "github.com" in repo_url:
-                pr_url = self._create_github_pr(repo_url, files, title, body, branch_name)
-            elif "gitlab.com" in repo_url:
-                pr_url = self._create_gitlab_mr(repo_url, files, title, body, branch_name)
-            else:
+            platform = _detect_platform(repo_url)
+            creators = {'github': self._create_github_pr, 'gitlab': self._create_gitlab_mr}
+            creator = creators.get(platform)
+            if creator is None:
                 raise ValueError(f"Unsupported repository platform: {repo_url}")
 
+            self._ensure_pack(platform)
+
+            pr_url = creator(repo_url, files, title, body, branch_name)
+
             # Attach dry-run artifacts if provided
             if dry_run_artifacts:
                 self.attach_artifacts(pr_url, dry_run_artifacts)
@@ -88,11 +256,11 @@ class PROrchestrator:
     def _create_github_pr(self, repo_url: str, files: Dict, title: str, body: str, branch_name: str) -> str:
         """Create GitHub PR"""
         # Extract repo name from URL
-        match = re.search(r'github\.com/([^/]+/[^/]+)', repo_url)
+        match = _GITHUB_REPO_RE.search(repo_url)
         if not match:
             raise ValueError("Invalid GitHub URL format")
 
-        repo_name = match.group(1).rstrip('.git')
+        repo_name = match.group(1).removesuffix('.git')
 
         # Prepare parameters for GitHub MCP
         params = {
@@ -101,7 +269,7 @@ class PROrchestrator:
             'branch_name': branch_name,
             'title': title,
             'body': body,
-            'files': files,
+            'files_batch': files,
             'base_branch': 'main'
         }
 
@@ -114,11 +282,11 @@ class PROrchestrator:
     def _create_gitlab_mr(self, repo_url: str, files: Dict, title: str, body: str, branch_name: str) -> str:
         """Create GitLab MR"""
         # Extract project path from URL
-        match = re.search(r'gitlab\.com/([^/]+/[^/]+)', repo_url)
+        match = _GITLAB_PROJECT_RE.search(repo_url)
         if not match:
             raise ValueError("Invalid GitLab URL format")
 
-        project_path = match.group(1).rstrip('.git')
+        project_path = match.group(1).removesuffix('.git')
 
         # Prepare parameters for GitLab MCP
         params = {
@@ -127,7 +295,7 @@ class PROrchestrator:
             'branch_name': branch_name,
             'title': title,
             'body': body,
-            'files': files,
+            'files_batch': files,
             'base_branch': 'main'
         }
 
@@ -142,21 +310,16 @@ class PROrchestrator:
         logger.info(f"Attaching artifacts to {pr_url}")
 
         try:
-            if "github.com" in pr_url:
-                result = pack_manager.execute_action('github', 'attach_artifacts', {
-                    'pr_url': pr_url,
-                    'artifacts': artifacts
-                })
-                return result.get('success', False)
-            elif "gitlab.com" in pr_url:
-                result = pack_manager.execute_action('gitlab', 'attach_artifacts', {
-                    'pr_url': pr_url,
-                    'artifacts': artifacts
-                })
-                return result.get('success', False)
-            else:
+            platform = _detect_platform(pr_url)
+            if platform is None:
                 raise ValueError(f"Unsupported platform for PR: {pr_url}")
 
+            result = pack_manager.execute_action(platform, 'attach_artifacts', {
+                'pr_url': pr_url,
+                'artifacts': artifacts
+            })
+            return result.get('success', False)
+
         except Exception as e:
             logger.error(f"Failed to attach artifacts to {pr_url}: {e}")
             raise
@@ -187,57 +350,20 @@ class PROrchestrator:
                 all_files[f"deploy/chart/{path}"] = content
 
         # Prepare enhanced body with infrastructure details
-        body = f"""# F-Ops Generated Infrastructure Configuration
-
-This PR adds infrastructure configuration for **{target}** deployment generated by F-Ops.
-
-## Configuration Summary
-- **Target Platform**: {target}
-- **Environments**: {', '.join(environments)}
-- **Domain**: {domain}
-
-## Generated Components
-"""
-
-        if terraform_files:
-            body += """
-### 🏗️ Terraform Infrastructure
-- Network modules (VPC, subnets, NAT gateways)
-- Container registry (ECR/ACR)
-- DNS configuration (Route53/Azure DNS, SSL certificates)
-- Secrets management integration
-"""
-
-        if helm_files:
-            body += """
-### ⎈ Helm Chart
-- Kubernetes deployment configuration
-- Service and ingress definitions
-- ConfigMaps and environment-specific values
-- Autoscaling and resource limits
-"""
-
-        body += f"""
-## Validation Results
-
-### Terraform Plan
-- **Status**: {terraform_plan.get('status', 'unknown')}
-- **Resources to add**: {terraform_plan.get('summary', {}).get('add', 0)}
-- **Resources to change**: {terraform_plan.get('summary', {}).get('change', 0)}
-- **Resources to destroy**: {terraform_plan.get('summary', {}).get('destroy', 0)}
-
-### Helm Dry-Run
-- **Status**: {helm_dry_run.get('status', 'unknown')}
-- **Lint passed**: {'✅' if helm_dry_run.get('lint', {}).get('passed') else '❌'}
-- **Manifests generated**: {len(helm_dry_run.get('manifests', []))}
-
-## Knowledge Base Citations
-{self._format_citations(citations)}
-
----
-*Generated by F-Ops Infrastructure Agent*
-*Review all changes and plan outputs before merging*
-"""
+        plan_summary = terraform_plan.get('summary', {})
+        body = _render_infra_body(
+            target,
+            tuple(environments),
+            domain,
+            bool(terraform_files),
+            bool(helm_files),
+            terraform_plan.get('status', 'unknown'),
+            (plan_summary.get('add', 0), plan_summary.get('change', 0), plan_summary.get('destroy', 0)),
+            helm_dry_run.get('status', 'unknown'),
+            bool(helm_dry_run.get('lint', {}).get('passed')),
+            len(helm_dry_run.get('manifests', [])),
+            tuple(citations)
+        )
 
         # Prepare infrastructure-specific artifacts
         artifacts = {
@@ -315,43 +441,56 @@ This PR adds a CI/CD pipeline generated by F-Ops with the following features:
 
     def _format_citations(self, citations: List[str]) -> str:
         """Format citations for PR body"""
-        if not citations:
-            return "No knowledge base sources referenced."
-
-        formatted = []
-        for i, citation in enumerate(citations, 1):
-            formatted.append(f"{i}. {citation}")
-
-        return "\n".join(formatted)
+        return _format_citations(citations)
 
     def _generate_branch_suffix(self) -> str:
         """Generate unique branch suffix"""
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-        return timestamp
+        return f"{_branch_epoch:x}-{os.getpid():x}-{next(_branch_counter):x}"
 
     def check_repository_access(self, repo_url: str) -> Dict[str, Any]:
         """Check if we have access to create PRs in the repository"""
-        try:
-            if "github.com" in repo_url:
-                # Extract repo path
-                match = re.search(r'github\.com/([^/]+/[^/]+)', repo_url)
-                if match:
-                    repo_path = match.group(1).rstrip('.git')
-                    github_pack = pack_manager.get_pack('github')
-                    if github_pack and github_pack.initialized:
-                        return github_pack.check_repo_access(repo_path)
-
-            elif "gitlab.com" in repo_url:
-                # Extract project path
-                match = re.search(r'gitlab\.com/([^/]+/[^/]+)', repo_url)
-                if match:
-                    project_path = match.group(1).rstrip('.git')
-                    gitlab_pack = pack_manager.get_pack('gitlab')
-                    if gitlab_pack and gitlab_pack.initialized:
-                        return gitlab_pack.check_project_access(project_path)
-
-            return {"access": False, "reason": "Unsupported platform"}
+        now = time.monotonic()
+        with _access_cache_lock:
+            cached = _access_cache.get(repo_url)
+            if cached and cached[0] > now:
+                return cached[1]
 
+        try:
+            result = self._probe_repository_access(repo_url)
         except Exception as e:
-            return {"access": False, "reason": str(e)}
\ No newline at end of file
+            return {"access": False, "reason": str(e)}
+
+        # Only cache granted access so fixed permissions or transient errors are picked up on retry
+        if not result.get("access"):
+            return result
+
+        with _access_cache_lock:
+            if len(_access_cache) >= _ACCESS_CACHE_MAXSIZE:
+                _access_cache.pop(next(iter(_access_cache)))
+            _access_cache[repo_url] = (now + _ACCESS_CACHE_TTL, result)
+
+        return result
+
+    def _probe_repository_access(self, repo_url: str) -> Dict[str, Any]:
+        """Ask the platform pack whether the repository is reachable"""
+        platform = _detect_platform(repo_url)
+        self._ensure_pack(platform)
+        if platform == 'github':
+            # Extract repo path
+            match = _GITHUB_REPO_RE.search(repo_url)
+            if match:
+                repo_path = match.group(1).removesuffix('.git')
+                github_pack = pack_manager.get_pack('github')
+                if github_pack and github_pack.initialized:
+                    return github_pack.check_repo_access(repo_path)
+
+        elif platform == 'gitlab':
+            # Extract project path
+            match = _GITLAB_PROJECT_RE.search(repo_url)
+            if match:
+                project_path = match.group(1).removesuffix('.git')
+                gitlab_pack = pack_manager.get_pack('gitlab')
+                if gitlab_pack and gitlab_pack.initialized:
+                    return gitlab_pack.check_project_access(project_path)
+
+        return {"access": False, "reason": "Unsupported platform"}
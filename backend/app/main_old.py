@@ -1,15 +1,30 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import anyio
+import hashlib
+import json
 import logging
-import sys
 import os
+import sys
+import threading
+import time
+
+if __name__ == "__main__":
+    # Started directly (python backend/app/main_old.py), which puts only backend/app on the path: add
+    # the backend dir for the app package and the project root for mcp_packs. Importing app.main_old
+    # leaves sys.path alone; uvicorn's spawned workers inherit the parent's path
+    _backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for _path in (_backend_dir, os.path.dirname(_backend_dir)):
+        if _path not in sys.path:
+            sys.path.insert(0, _path)
 
-# Add project root to Python path for mcp_packs and knowledge_base
-project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+from app.core.job_queue import JobQueue
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,18 +33,46 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="F-Ops DevOps AI Agent",
     version="0.1.0",
-    description="AI-powered DevOps automation platform"
+    description="AI-powered DevOps automation platform",
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
+@lru_cache(maxsize=1)
+def _get_settings():
+    """App settings, loaded on first use; None when app.config can't load (simulation-only installs)"""
+    try:
+        from app.config import settings
+        return settings
+    except ImportError as e:
+        logger.warning(f"Settings unavailable, using local defaults: {e}")
+        return None
+
+def _allowed_origins() -> List[str]:
+    """Frontends allowed to call /api"""
+    settings = _get_settings()
+    return settings.ALLOWED_ORIGINS if settings else ["http://localhost:3000", "http://localhost:8000"]
+
+class _APICORSMiddleware(CORSMiddleware):
+    """CORS for /api routes only; load balancer probes of / and /health bypass it"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# CORS middleware, limited to the configured frontends
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
+    _APICORSMiddleware,
+    allow_origins=_allowed_origins(),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["authorization", "content-type"],
 )
 
+# KB search results are text-heavy JSON; compress anything over 1 KB
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Request models
 class OnboardRequest(BaseModel):
     repo_url: str
@@ -52,66 +95,122 @@ class KBSearchRequest(BaseModel):
     collection: Optional[str] = None
     limit: int = 5
 
-# Initialize agent lazily
-_agent = None
+try:
+    from app.core.agent_fixed import DevOpsAgent
+except ImportError as e:
+    DevOpsAgent = None
+    logger.warning(f"DevOps Agent unavailable, running in simulation mode: {e}")
 
+@lru_cache(maxsize=1)
 def get_agent():
-    global _agent
-    if _agent is None:
-        try:
-            from app.core.agent_fixed import DevOpsAgent
-            _agent = DevOpsAgent()
-            logger.info("DevOps Agent initialized")
-        except Exception as e:
-            logger.error(f"Failed to initialize agent: {e}")
-    return _agent
+    """Build the shared DevOps agent once; None means simulation mode"""
+    if DevOpsAgent is None:
+        return None
+    try:
+        agent = DevOpsAgent()
+        logger.info("DevOps Agent initialized")
+        return agent
+    except Exception as e:
+        logger.error(f"Failed to initialize agent: {e}")
+        return None
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> JobQueue:
+    """Shared queue for onboarding and incident analysis, which run for tens of seconds"""
+    settings = _get_settings()
+    return JobQueue(settings.JOBS_DB_PATH if settings else "./fops_jobs.db")
+
+async def _enqueue(kind: str, fn, *args) -> Response:
+    """Queue an agent call and answer 202 with where to poll for it"""
+    job_id = await run_in_threadpool(get_job_queue().submit, kind, fn, *args)
+    return ORJSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}
+    )
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
     logger.info("Starting F-Ops DevOps AI Agent...")
+    # Agent calls are blocking and run in the worker thread pool; size it for concurrent requests
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 40
+    # Build the agent before the first request rather than inside it
+    get_agent()
+    get_job_queue()
     logger.info("Server is ready to accept requests")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Let queued jobs record their outcome before the worker exits"""
+    await run_in_threadpool(get_job_queue().shutdown)
+
+# Static payloads for the endpoints load balancers poll
+_ROOT_INFO = {
+    "name": "F-Ops",
+    "version": "0.1.0",
+    "status": "operational",
+    "endpoints": {
+        "health": "/health",
+        "onboard": "/api/onboard/repo",
+        "deploy": "/api/deploy/service",
+        "incident": "/api/incident/analyze",
+        "kb_search": "/api/kb/search"
+    }
+}
+_HEALTH_INFO = {
+    "status": "healthy",
+    "services": {
+        "api": "operational",
+        "agent": "ready"
+    }
+}
+_STATIC_MAX_AGE = 10
+
+# KB stats change slowly; serve them from memory for a short while
+_KB_STATS_TTL = 30
+_KB_STATS_MAX_AGE = 30
+_kb_stats_cache: Dict[Optional[str], Tuple[float, Any]] = {}
+_kb_stats_cache_lock = threading.Lock()
+
+def _etag(payload: Any) -> str:
+    """Weak ETag over the JSON form of a payload"""
+    digest = hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+def _cacheable_json(request: Request, payload: Any, max_age: int, etag: Optional[str] = None) -> Response:
+    """JSON response with Cache-Control and ETag, or a bare 304 if the client's copy is current"""
+    etag = etag or _etag(payload)
+    headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": etag}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(content=payload, headers=headers)
+
+_ROOT_ETAG = _etag(_ROOT_INFO)
+_HEALTH_ETAG = _etag(_HEALTH_INFO)
+
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Root endpoint"""
-    return {
-        "name": "F-Ops",
-        "version": "0.1.0",
-        "status": "operational",
-        "endpoints": {
-            "health": "/health",
-            "onboard": "/api/onboard/repo",
-            "deploy": "/api/deploy/service",
-            "incident": "/api/incident/analyze",
-            "kb_search": "/api/kb/search"
-        }
-    }
+    return _cacheable_json(request, _ROOT_INFO, _STATIC_MAX_AGE, _ROOT_ETAG)
 
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "services": {
-            "api": "operational",
-            "agent": "ready"
-        }
-    }
+    return _cacheable_json(request, _HEALTH_INFO, _STATIC_MAX_AGE, _HEALTH_ETAG)
 
 # Onboarding endpoints
 @app.post("/api/onboard/repo")
-async def onboard_repository(request: OnboardRequest):
+async def onboard_repository(request: OnboardRequest, agent=Depends(get_agent)):
     """Onboard a new repository"""
     try:
-        agent = get_agent()
         if agent:
-            result = agent.onboard_repository(
+            return await _enqueue(
+                "onboard",
+                agent.onboard_repository,
                 request.repo_url,
                 request.target,
                 request.environments
             )
-            return result
         else:
             return {
                 "success": True,
@@ -127,12 +226,12 @@ async def onboard_repository(request: OnboardRequest):
 
 # Deployment endpoints
 @app.post("/api/deploy/service")
-async def deploy_service(request: DeployRequest):
+async def deploy_service(request: DeployRequest, agent=Depends(get_agent)):
     """Deploy a service to an environment"""
     try:
-        agent = get_agent()
         if agent:
-            result = agent.deploy_service(
+            result = await run_in_threadpool(
+                agent.deploy_service,
                 request.service_name,
                 request.environment,
                 request.version,
@@ -155,16 +254,16 @@ async def deploy_service(request: DeployRequest):
 
 # Incident endpoints
 @app.post("/api/incident/analyze")
-async def analyze_incident(request: IncidentRequest):
+async def analyze_incident(request: IncidentRequest, agent=Depends(get_agent)):
     """Analyze an incident"""
     try:
-        agent = get_agent()
         if agent:
-            result = agent.analyze_incident(
+            return await _enqueue(
+                "incident",
+                agent.analyze_incident,
                 request.service_name,
                 request.symptoms
             )
-            return result
         else:
             return {
                 "success": True,
@@ -192,22 +291,32 @@ Note: Running in simulation mode
         logger.error(f"Incident analysis error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Job endpoints
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll a queued onboarding or incident analysis job"""
+    job = await run_in_threadpool(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 # Knowledge Base endpoints
 @app.post("/api/kb/search")
-async def search_knowledge(request: KBSearchRequest):
+async def search_knowledge(request: KBSearchRequest, agent=Depends(get_agent)):
     """Search the knowledge base"""
     try:
-        agent = get_agent()
         if agent and agent.kb:
             if request.collection:
-                results = agent.kb.search(request.collection, request.query, k=request.limit)
+                results = await run_in_threadpool(agent.kb.search, request.collection, request.query, k=request.limit)
+                count = len(results)
             else:
-                results = agent.kb.search_all(request.query, k=request.limit)
+                results = await run_in_threadpool(agent.kb.search_all, request.query, k=request.limit)
+                count = sum(map(len, results.values()))
             
             return {
                 "query": request.query,
                 "results": results,
-                "count": len(results) if isinstance(results, list) else sum(len(v) for v in results.values())
+                "count": count
             }
         else:
             return {
@@ -224,13 +333,19 @@ async def search_knowledge(request: KBSearchRequest):
         }
 
 @app.get("/api/kb/stats")
-async def get_kb_stats(collection: Optional[str] = None):
+async def get_kb_stats(request: Request, collection: Optional[str] = None, agent=Depends(get_agent)):
     """Get knowledge base statistics"""
     try:
-        agent = get_agent()
         if agent and agent.kb:
-            stats = agent.kb.get_collection_stats(collection)
-            return stats
+            with _kb_stats_cache_lock:
+                cached = _kb_stats_cache.get(collection)
+            if cached is not None and time.monotonic() - cached[0] < _KB_STATS_TTL:
+                stats = cached[1]
+            else:
+                stats = await run_in_threadpool(agent.kb.get_collection_stats, collection)
+                with _kb_stats_cache_lock:
+                    _kb_stats_cache[collection] = (time.monotonic(), stats)
+            return _cacheable_json(request, stats, _KB_STATS_MAX_AGE)
         else:
             return {
                 "message": "Knowledge base not available"
@@ -241,4 +356,16 @@ async def get_kb_stats(collection: Optional[str] = None):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Workers need an import string, resolved from the backend dir in each worker process;
+    # uvloop and httptools ship with uvicorn[standard]
+    uvicorn.run(
+        "app.main_old:app",
+        app_dir=_backend_dir,
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
+        limit_concurrency=1000,
+        timeout_keep_alive=30
+    )
\ No newline at end of file
@@ -0,0 +1,124 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List
+from app.config import settings
+from app.core.audit_logger import AuditLogger
+from mcp_packs.base.allowlist import build_allowlist, is_repo_allowed
+import httpx
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Repository/project handles are reused across calls; bounded LRU with a TTL so metadata stays fresh
+_HANDLE_CACHE_TTL = 300
+_HANDLE_CACHE_MAXSIZE = 128
+
+# Keep-alive connections reused across calls; room for fan-out plus concurrent requests
+_HTTP_POOL_SIZE = 20
+_HTTP_TIMEOUT = 30
+
+# Job logs are streamed straight from the API; reads can stall while a runner flushes
+_LOG_TIMEOUT = httpx.Timeout(10.0, read=60.0)
+
+
+class MCPForgeServer(ABC):
+    """Shared plumbing for the GitHub/GitLab MCP servers: allow-list, handle cache, log streaming, audit"""
+
+    # Display name used in errors and warnings, and the agent name recorded in the audit log
+    platform: str = ""
+    audit_agent: str = ""
+
+    def __init__(self, token: str, allowed_repos: List[str] = None, audit_logger: AuditLogger = None):
+        self.token = token
+        self.client = self._build_client() if self.token else None
+        self.allowed_repos = allowed_repos or settings.ALLOWED_REPOS
+        self._allowlist = build_allowlist(self.allowed_repos)
+        self.audit_logger = audit_logger
+        self._handle_cache: OrderedDict = OrderedDict()
+        self._handle_cache_lock = threading.Lock()
+        self._log_client = None
+
+        if not self.client:
+            logger.warning(f"{self.platform} MCP server initialized without token - limited functionality")
+
+    @abstractmethod
+    def _build_client(self):
+        """Create the platform API client"""
+        pass
+
+    @abstractmethod
+    def _fetch_handle(self, path: str):
+        """Fetch a repository/project handle from the API"""
+        pass
+
+    @abstractmethod
+    def _log_client_options(self) -> Dict[str, Any]:
+        """base_url, auth headers and redirect policy for the log-streaming client"""
+        pass
+
+    def _require_client(self):
+        if not self.client:
+            raise ValueError(f"{self.platform} token not configured")
+
+    def _get_handle(self, path: str):
+        """Fetch a repository/project handle, reusing it for the cache TTL"""
+        now = time.monotonic()
+        with self._handle_cache_lock:
+            cached = self._handle_cache.get(path)
+            if cached and cached[0] > now:
+                self._handle_cache.move_to_end(path)
+                return cached[1]
+
+        handle = self._fetch_handle(path)
+
+        with self._handle_cache_lock:
+            self._handle_cache[path] = (now + _HANDLE_CACHE_TTL, handle)
+            self._handle_cache.move_to_end(path)
+            while len(self._handle_cache) > _HANDLE_CACHE_MAXSIZE:
+                self._handle_cache.popitem(last=False)
+        return handle
+
+    def validate_repo(self, repo_url: str) -> bool:
+        """Check if repo is allow-listed"""
+        if not self.allowed_repos:
+            logger.warning("No allow-listed repos configured - allowing all")
+            return True
+
+        if not is_repo_allowed(repo_url, self._allowlist):
+            logger.error(f"Repository not allow-listed: {repo_url}")
+            raise ValueError(f"Repository not allow-listed: {repo_url}")
+
+        return True
+
+    def _audit_pr(self, params: Dict[str, Any], pr_url: str):
+        """Record a created PR/MR in the audit log"""
+        if self.audit_logger:
+            self.audit_logger.log_pr_creation(
+                repo_url=params['repo_url'],
+                pr_url=pr_url,
+                agent=self.audit_agent,
+                files=params['files']
+            )
+
+    def _get_log_client(self) -> httpx.AsyncClient:
+        """Keep-alive client for streaming job logs, created on first use"""
+        if self._log_client is None:
+            self._log_client = httpx.AsyncClient(timeout=_LOG_TIMEOUT, **self._log_client_options())
+        return self._log_client
+
+    async def _stream_job_log(self, url: str):
+        """Pass a job log on chunk by chunk instead of reading it whole"""
+        async with self._get_log_client().stream("GET", url) as response:
+            if response.status_code == 404:
+                yield b"(logs not available)\n"
+                return
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
+    async def aclose(self):
+        """Close pooled HTTP connections"""
+        if self._log_client is not None:
+            await self._log_client.aclose()
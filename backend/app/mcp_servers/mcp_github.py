@@ -1,89 +1,93 @@
-from github import Github
-from typing import Dict, Any, List
+from github import Github, InputGitTreeElement
+from github.GithubException import GithubException
+from typing import Dict, Any, List, AsyncIterator
 from app.config import settings
 from app.core.audit_logger import AuditLogger
+from app.mcp_servers.forge_base import MCPForgeServer
+from mcp_packs.base.artifacts import artifacts_markdown
+from mcp_packs.github.client import BLOB_CONCURRENCY, build_github_client
+import asyncio
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
-class MCPGitHub:
+# Matches https://github.com/<owner>/<repo>/pull/<number>
+_PR_URL_RE = re.compile(r'github\.com/([^/]+)/([^/]+)/pull/(\d+)')
+
+
+async def _run_concurrently(*coros) -> List[Any]:
+    """Run independent API calls in a TaskGroup; the first failure is re-raised unwrapped"""
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(coro) for coro in coros]
+    except ExceptionGroup as group:
+        raise group.exceptions[0] from None
+    return [task.result() for task in tasks]
+
+
+class MCPGitHub(MCPForgeServer):
     """MCP GitHub server for typed PR creation and workflow management"""
 
-    def __init__(self, token: str = None, allowed_repos: List[str] = None, audit_logger: AuditLogger = None):
-        self.token = token or settings.MCP_GITHUB_TOKEN
-        self.client = Github(self.token) if self.token else None
-        self.allowed_repos = allowed_repos or settings.ALLOWED_REPOS
-        self.audit_logger = audit_logger
+    platform = "GitHub"
+    audit_agent = "mcp_github"
 
-        if not self.client:
-            logger.warning("GitHub MCP server initialized without token - limited functionality")
+    def __init__(self, token: str = None, allowed_repos: List[str] = None, audit_logger: AuditLogger = None):
+        super().__init__(token or settings.MCP_GITHUB_TOKEN, allowed_repos, audit_logger)
 
-    def validate_repo(self, repo_url: str) -> bool:
-        """Check if repo is allow-listed"""
-        if not self.allowed_repos:
-            logger.warning("No allow-listed repos configured - allowing all")
-            return True
+    def _build_client(self) -> Github:
+        return build_github_client(self.token)
 
-        is_allowed = any(allowed in repo_url for allowed in self.allowed_repos)
-        if not is_allowed:
-            logger.error(f"Repository not allow-listed: {repo_url}")
-            raise ValueError(f"Repository not allow-listed: {repo_url}")
+    def _fetch_handle(self, path: str):
+        return self.client.get_repo(path)
 
-        return True
+    def _log_client_options(self) -> Dict[str, Any]:
+        # The logs endpoint redirects to a short-lived download; httpx drops the token on that hop
+        return {
+            "base_url": "https://api.github.com",
+            "headers": {"Authorization": f"Bearer {self.token}"},
+            "follow_redirects": True
+        }
 
-    def create_pr(self, params: Dict[str, Any]) -> str:
+    async def create_pr(self, params: Dict[str, Any]) -> str:
         """Create PR with typed interface (no shell execution)"""
-        if not self.client:
-            raise ValueError("GitHub token not configured")
+        self._require_client()
 
         self.validate_repo(params['repo_url'])
 
         try:
             # Parse repo info
             repo_path = params['repo_name']  # format: "owner/repo"
-            repo = self.client.get_repo(repo_path)
+            # PyGithub is blocking; every API call runs in a worker thread to keep the event loop free
+            repo = await asyncio.to_thread(self._get_handle, repo_path)
 
             # Create branch
-            base_branch = repo.get_branch(params.get('base_branch', 'main'))
             branch_name = params['branch_name']
 
+            # The base branch lookup and the existing-branch check are independent reads
+            base_branch, branch_exists = await _run_concurrently(
+                asyncio.to_thread(repo.get_branch, params.get('base_branch', 'main')),
+                self._branch_exists(repo, branch_name)
+            )
+
             # Check if branch already exists
-            try:
-                repo.get_branch(branch_name)
+            if branch_exists:
                 logger.warning(f"Branch {branch_name} already exists")
-            except:
+            else:
                 # Create new branch
-                repo.create_git_ref(
+                await asyncio.to_thread(
+                    repo.create_git_ref,
                     ref=f"refs/heads/{branch_name}",
                     sha=base_branch.commit.sha
                 )
                 logger.info(f"Created branch: {branch_name}")
 
-            # Add/update files
-            for file_path, content in params['files'].items():
-                try:
-                    # Try to get existing file
-                    existing_file = repo.get_contents(file_path, ref=branch_name)
-                    repo.update_file(
-                        path=file_path,
-                        message=f"Update {file_path}",
-                        content=content,
-                        sha=existing_file.sha,
-                        branch=branch_name
-                    )
-                    logger.info(f"Updated file: {file_path}")
-                except:
-                    # Create new file
-                    repo.create_file(
-                        path=file_path,
-                        message=f"Add {file_path}",
-                        content=content,
-                        branch=branch_name
-                    )
-                    logger.info(f"Created file: {file_path}")
+            # Add/update files as a single commit
+            await self._commit_files(repo, params['files'], branch_name)
 
             # Create PR
-            pr = repo.create_pull(
+            pr = await asyncio.to_thread(
+                repo.create_pull,
                 title=params['title'],
                 body=params['body'],
                 head=branch_name,
@@ -93,14 +97,7 @@ class MCPGitHub:
             pr_url = pr.html_url
             logger.info(f"PR created: {pr_url}")
 
-            # Log to audit
-            if self.audit_logger:
-                self.audit_logger.log_pr_creation(
-                    repo_url=params['repo_url'],
-                    pr_url=pr_url,
-                    agent="mcp_github",
-                    files=params['files']
-                )
+            self._audit_pr(params, pr_url)
 
             return pr_url
 
@@ -108,35 +105,99 @@ class MCPGitHub:
             logger.error(f"Failed to create PR: {e}")
             raise
 
-    def attach_artifacts(self, pr_url: str, artifacts: Dict[str, Any]) -> bool:
+    async def _branch_exists(self, repo, branch_name: str) -> bool:
+        """Check whether a branch already exists; only a 404 means it doesn't"""
+        try:
+            await asyncio.to_thread(repo.get_branch, branch_name)
+            return True
+        except GithubException as e:
+            if e.status != 404:
+                raise
+            return False
+
+    async def _commit_files(self, repo, files: Dict[str, str], branch_name: str):
+        """Write all files with one tree and one commit, falling back to per-file commits on 422"""
+        if not files:
+            return
+
+        semaphore = asyncio.Semaphore(BLOB_CONCURRENCY)
+
+        async def create_blob(file_path: str, content: str) -> InputGitTreeElement:
+            async with semaphore:
+                blob = await asyncio.to_thread(repo.create_git_blob, content, "utf-8")
+            return InputGitTreeElement(file_path, "100644", "blob", sha=blob.sha)
+
+        async def get_head():
+            ref = await asyncio.to_thread(repo.get_git_ref, f"heads/{branch_name}")
+            return ref, await asyncio.to_thread(repo.get_git_commit, ref.object.sha)
+
+        try:
+            # The branch head lookup does not depend on the blobs, so it runs alongside the uploads
+            (ref, parent), *elements = await _run_concurrently(
+                get_head(),
+                *(create_blob(path, content) for path, content in files.items())
+            )
+
+            tree = await asyncio.to_thread(repo.create_git_tree, elements, parent.tree)
+            commit = await asyncio.to_thread(
+                repo.create_git_commit,
+                f"Add F-Ops generated files ({len(files)})",
+                tree,
+                [parent]
+            )
+            await asyncio.to_thread(ref.edit, commit.sha)
+            logger.info(f"Committed {len(files)} files to {branch_name} in {commit.sha[:7]}")
+        except GithubException as e:
+            if e.status != 422:
+                raise
+            logger.warning(f"Batched commit rejected ({e}), falling back to per-file commits")
+            await self._commit_files_individually(repo, files, branch_name)
+
+    async def _commit_files_individually(self, repo, files: Dict[str, str], branch_name: str):
+        """Create or update each file with its own commit"""
+        for file_path, content in files.items():
+            try:
+                existing_file = await asyncio.to_thread(repo.get_contents, file_path, ref=branch_name)
+            except GithubException as e:
+                if e.status != 404:
+                    raise
+                existing_file = None
+
+            if existing_file is not None:
+                await asyncio.to_thread(
+                    repo.update_file,
+                    path=file_path,
+                    message=f"Update {file_path}",
+                    content=content,
+                    sha=existing_file.sha,
+                    branch=branch_name
+                )
+                logger.info(f"Updated file: {file_path}")
+            else:
+                await asyncio.to_thread(
+                    repo.create_file,
+                    path=file_path,
+                    message=f"Add {file_path}",
+                    content=content,
+                    branch=branch_name
+                )
+                logger.info(f"Created file: {file_path}")
+
+    async def attach_artifacts(self, pr_url: str, artifacts: Dict[str, Any]) -> bool:
         """Attach dry-run/plan artifacts to PR as comment"""
-        if not self.client:
-            raise ValueError("GitHub token not configured")
+        self._require_client()
 
         try:
             # Parse PR URL to get repo and PR number
-            import re
-            match = re.search(r'github\.com/([^/]+)/([^/]+)/pull/(\d+)', pr_url)
+            match = _PR_URL_RE.search(pr_url)
             if not match:
                 raise ValueError("Invalid GitHub PR URL")
 
             owner, repo_name, pr_number = match.groups()
-            repo = self.client.get_repo(f"{owner}/{repo_name}")
-            pr = repo.get_pull(int(pr_number))
-
-            # Format artifacts as markdown comment
-            comment_body = "## F-Ops Dry-Run Artifacts\n\n"
+            repo = await asyncio.to_thread(self._get_handle, f"{owner}/{repo_name}")
+            pr = await asyncio.to_thread(repo.get_pull, int(pr_number))
 
-            for artifact_type, content in artifacts.items():
-                comment_body += f"### {artifact_type.title()}\n\n"
-                comment_body += "```\n"
-                comment_body += str(content)
-                comment_body += "\n```\n\n"
-
-            comment_body += "---\n*Generated by F-Ops Pipeline Agent*"
-
-            # Add comment to PR
-            pr.create_issue_comment(comment_body)
+            await asyncio.to_thread(pr.create_issue_comment, artifacts_markdown(artifacts))
             logger.info(f"Artifacts attached to PR: {pr_url}")
 
             return True
@@ -145,37 +206,39 @@ class MCPGitHub:
             logger.error(f"Failed to attach artifacts to PR {pr_url}: {e}")
             raise
 
-    def get_workflow_logs(self, repo_path: str, workflow_run_id: int) -> str:
-        """Fetch workflow logs for debugging"""
-        if not self.client:
-            raise ValueError("GitHub token not configured")
+    async def get_workflow_logs(self, repo_path: str, workflow_run_id: int) -> AsyncIterator[bytes]:
+        """Stream workflow logs for debugging, job by job; wrap in a StreamingResponse"""
+        self._require_client()
 
         try:
-            repo = self.client.get_repo(repo_path)
-            workflow_run = repo.get_workflow_run(workflow_run_id)
-
-            # Get logs URL (this would require additional API calls for full implementation)
-            logs_info = {
-                "workflow_run_id": workflow_run_id,
-                "status": workflow_run.status,
-                "conclusion": workflow_run.conclusion,
-                "url": workflow_run.html_url,
-                "created_at": workflow_run.created_at.isoformat()
-            }
-
-            return f"Workflow Run Info: {logs_info}"
-
+            repo = await asyncio.to_thread(self._get_handle, repo_path)
+            workflow_run = await asyncio.to_thread(repo.get_workflow_run, workflow_run_id)
+            jobs = await asyncio.to_thread(lambda: list(workflow_run.jobs()))
         except Exception as e:
             logger.error(f"Failed to get workflow logs: {e}")
             raise
 
+        logs_info = {
+            "workflow_run_id": workflow_run_id,
+            "status": workflow_run.status,
+            "conclusion": workflow_run.conclusion,
+            "url": workflow_run.html_url,
+            "created_at": workflow_run.created_at.isoformat()
+        }
+        yield f"Workflow Run Info: {logs_info}\n".encode()
+
+        for job in jobs:
+            yield f"\n=== {job.name} ({job.conclusion or job.status}) ===\n".encode()
+            async for chunk in self._stream_job_log(f"/repos/{repo_path}/actions/jobs/{job.id}/logs"):
+                yield chunk
+
     def check_repo_access(self, repo_path: str) -> Dict[str, Any]:
         """Check if we have access to repository"""
         if not self.client:
             return {"access": False, "reason": "No GitHub token configured"}
 
         try:
-            repo = self.client.get_repo(repo_path)
+            repo = self._get_handle(repo_path)
             permissions = repo.permissions
 
             return {
@@ -194,4 +257,10 @@ class MCPGitHub:
                 "access": False,
                 "repo": repo_path,
                 "reason": str(e)
-            }
\ No newline at end of file
+            }
+
+    async def aclose(self):
+        """Close pooled HTTP connections"""
+        await super().aclose()
+        if self.client:
+            await asyncio.to_thread(self.client.close)
\ No newline at end of file
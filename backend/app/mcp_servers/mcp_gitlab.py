@@ -1,54 +1,70 @@
 import gitlab
-from typing import Dict, Any, List
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, AsyncIterator
 from app.config import settings
 from app.core.audit_logger import AuditLogger
+from app.mcp_servers.forge_base import MCPForgeServer, _HTTP_POOL_SIZE, _HTTP_TIMEOUT
+from mcp_packs.base.artifacts import artifacts_markdown
+import asyncio
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
-class MCPGitLab:
+# Matches https://gitlab.com/<owner>/<repo>/-/merge_requests/<iid>
+_MR_URL_RE = re.compile(r'gitlab\.com/([^/]+)/([^/]+)/-/merge_requests/(\d+)')
+
+
+def _build_session() -> requests.Session:
+    """Keep-alive session with a bounded connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    return session
+
+class MCPGitLab(MCPForgeServer):
     """MCP GitLab server for typed MR creation and pipeline management"""
 
-    def __init__(self, token: str = None, allowed_repos: List[str] = None, audit_logger: AuditLogger = None):
-        self.token = token or settings.MCP_GITLAB_TOKEN
-        self.client = gitlab.Gitlab('https://gitlab.com', private_token=self.token) if self.token else None
-        self.allowed_repos = allowed_repos or settings.ALLOWED_REPOS
-        self.audit_logger = audit_logger
+    platform = "GitLab"
+    audit_agent = "mcp_gitlab"
+    session = None
 
-        if not self.client:
-            logger.warning("GitLab MCP server initialized without token - limited functionality")
+    def __init__(self, token: str = None, allowed_repos: List[str] = None, audit_logger: AuditLogger = None):
+        super().__init__(token or settings.MCP_GITLAB_TOKEN, allowed_repos, audit_logger)
 
-    def validate_repo(self, repo_url: str) -> bool:
-        """Check if repo is allow-listed"""
-        if not self.allowed_repos:
-            logger.warning("No allow-listed repos configured - allowing all")
-            return True
+    def _build_client(self) -> gitlab.Gitlab:
+        self.session = _build_session()
+        return gitlab.Gitlab('https://gitlab.com', private_token=self.token, session=self.session,
+                             timeout=_HTTP_TIMEOUT)
 
-        is_allowed = any(allowed in repo_url for allowed in self.allowed_repos)
-        if not is_allowed:
-            logger.error(f"Repository not allow-listed: {repo_url}")
-            raise ValueError(f"Repository not allow-listed: {repo_url}")
+    def _fetch_handle(self, path: str):
+        return self.client.projects.get(path)
 
-        return True
+    def _log_client_options(self) -> Dict[str, Any]:
+        return {
+            "base_url": "https://gitlab.com/api/v4",
+            "headers": {"PRIVATE-TOKEN": self.token}
+        }
 
-    def create_mr(self, params: Dict[str, Any]) -> str:
+    async def create_mr(self, params: Dict[str, Any]) -> str:
         """Create GitLab MR with typed interface"""
-        if not self.client:
-            raise ValueError("GitLab token not configured")
+        self._require_client()
 
         self.validate_repo(params['repo_url'])
 
         try:
             # Get project
             project_id = params['project_id']
-            project = self.client.projects.get(project_id)
+            # python-gitlab is blocking; every API call runs in a worker thread to keep the event loop free
+            project = await asyncio.to_thread(self._get_handle, project_id)
 
             # Create branch
             branch_name = params['branch_name']
             base_branch = params.get('base_branch', 'main')
 
             try:
-                branch = project.branches.create({
+                branch = await asyncio.to_thread(project.branches.create, {
                     'branch': branch_name,
                     'ref': base_branch
                 })
@@ -59,26 +75,11 @@ class MCPGitLab:
                 else:
                     raise
 
-            # Add/update files
-            for file_path, content in params['files'].items():
-                try:
-                    # Try to get existing file
-                    existing_file = project.files.get(file_path=file_path, ref=branch_name)
-                    existing_file.content = content
-                    existing_file.save(branch=branch_name, commit_message=f"Update {file_path}")
-                    logger.info(f"Updated file: {file_path}")
-                except gitlab.exceptions.GitlabGetError:
-                    # Create new file
-                    project.files.create({
-                        'file_path': file_path,
-                        'branch': branch_name,
-                        'content': content,
-                        'commit_message': f"Add {file_path}"
-                    })
-                    logger.info(f"Created file: {file_path}")
+            # Add/update files as a single commit
+            await self._commit_files(project, params['files'], branch_name)
 
             # Create MR
-            mr = project.mergerequests.create({
+            mr = await asyncio.to_thread(project.mergerequests.create, {
                 'source_branch': branch_name,
                 'target_branch': base_branch,
                 'title': params['title'],
@@ -88,14 +89,7 @@ class MCPGitLab:
             mr_url = mr.web_url
             logger.info(f"MR created: {mr_url}")
 
-            # Log to audit
-            if self.audit_logger:
-                self.audit_logger.log_pr_creation(
-                    repo_url=params['repo_url'],
-                    pr_url=mr_url,
-                    agent="mcp_gitlab",
-                    files=params['files']
-                )
+            self._audit_pr(params, mr_url)
 
             return mr_url
 
@@ -103,35 +97,66 @@ class MCPGitLab:
             logger.error(f"Failed to create MR: {e}")
             raise
 
-    def attach_artifacts(self, mr_url: str, artifacts: Dict[str, Any]) -> bool:
+    async def _commit_files(self, project, files: Dict[str, str], branch_name: str):
+        """Write all files through one Commits API call, falling back to per-file commits"""
+        if not files:
+            return
+
+        commit_data = {
+            'branch': branch_name,
+            'commit_message': f"Add F-Ops generated files ({len(files)})",
+            'actions': [
+                {'action': 'create', 'file_path': file_path, 'content': content}
+                for file_path, content in files.items()
+            ]
+        }
+
+        try:
+            commit = await asyncio.to_thread(project.commits.create, commit_data)
+            logger.info(f"Committed {len(files)} files to {branch_name} in {commit.short_id}")
+        except gitlab.exceptions.GitlabCreateError as e:
+            # Rejected when a file already exists on the branch; the per-file path handles updates
+            logger.warning(f"Batched commit rejected ({e}), falling back to per-file commits")
+            await self._commit_files_individually(project, files, branch_name)
+
+    async def _commit_files_individually(self, project, files: Dict[str, str], branch_name: str):
+        """Create or update each file with its own commit"""
+        for file_path, content in files.items():
+            try:
+                existing_file = await asyncio.to_thread(project.files.get, file_path=file_path, ref=branch_name)
+            except gitlab.exceptions.GitlabGetError as e:
+                if e.response_code != 404:
+                    raise
+                existing_file = None
+
+            if existing_file is not None:
+                existing_file.content = content
+                await asyncio.to_thread(existing_file.save, branch=branch_name, commit_message=f"Update {file_path}")
+                logger.info(f"Updated file: {file_path}")
+            else:
+                await asyncio.to_thread(project.files.create, {
+                    'file_path': file_path,
+                    'branch': branch_name,
+                    'content': content,
+                    'commit_message': f"Add {file_path}"
+                })
+                logger.info(f"Created file: {file_path}")
+
+    async def attach_artifacts(self, mr_url: str, artifacts: Dict[str, Any]) -> bool:
         """Attach dry-run/plan artifacts to MR as note"""
-        if not self.client:
-            raise ValueError("GitLab token not configured")
+        self._require_client()
 
         try:
             # Parse MR URL to get project and MR IID
-            import re
-            match = re.search(r'gitlab\.com/([^/]+)/([^/]+)/-/merge_requests/(\d+)', mr_url)
+            match = _MR_URL_RE.search(mr_url)
             if not match:
                 raise ValueError("Invalid GitLab MR URL")
 
             owner, repo_name, mr_iid = match.groups()
-            project = self.client.projects.get(f"{owner}/{repo_name}")
-            mr = project.mergerequests.get(int(mr_iid))
-
-            # Format artifacts as markdown note
-            note_body = "## F-Ops Dry-Run Artifacts\n\n"
+            project = await asyncio.to_thread(self._get_handle, f"{owner}/{repo_name}")
+            mr = await asyncio.to_thread(project.mergerequests.get, int(mr_iid))
 
-            for artifact_type, content in artifacts.items():
-                note_body += f"### {artifact_type.title()}\n\n"
-                note_body += "```\n"
-                note_body += str(content)
-                note_body += "\n```\n\n"
-
-            note_body += "---\n*Generated by F-Ops Pipeline Agent*"
-
-            # Add note to MR
-            mr.notes.create({'body': note_body})
+            await asyncio.to_thread(mr.notes.create, {'body': artifacts_markdown(artifacts)})
             logger.info(f"Artifacts attached to MR: {mr_url}")
 
             return True
@@ -140,37 +165,39 @@ class MCPGitLab:
             logger.error(f"Failed to attach artifacts to MR {mr_url}: {e}")
             raise
 
-    def get_pipeline_logs(self, project_id: str, pipeline_id: int) -> str:
-        """Fetch pipeline logs for debugging"""
-        if not self.client:
-            raise ValueError("GitLab token not configured")
+    async def get_pipeline_logs(self, project_id: str, pipeline_id: int) -> AsyncIterator[bytes]:
+        """Stream pipeline logs for debugging, job by job; wrap in a StreamingResponse"""
+        self._require_client()
 
         try:
-            project = self.client.projects.get(project_id)
-            pipeline = project.pipelines.get(pipeline_id)
-
-            # Get pipeline info
-            pipeline_info = {
-                "pipeline_id": pipeline_id,
-                "status": pipeline.status,
-                "ref": pipeline.ref,
-                "web_url": pipeline.web_url,
-                "created_at": pipeline.created_at
-            }
-
-            return f"Pipeline Info: {pipeline_info}"
-
+            project = await asyncio.to_thread(self._get_handle, project_id)
+            pipeline = await asyncio.to_thread(project.pipelines.get, pipeline_id)
+            jobs = await asyncio.to_thread(pipeline.jobs.list, all=True)
         except Exception as e:
             logger.error(f"Failed to get pipeline logs: {e}")
             raise
 
+        pipeline_info = {
+            "pipeline_id": pipeline_id,
+            "status": pipeline.status,
+            "ref": pipeline.ref,
+            "web_url": pipeline.web_url,
+            "created_at": pipeline.created_at
+        }
+        yield f"Pipeline Info: {pipeline_info}\n".encode()
+
+        for job in jobs:
+            yield f"\n=== {job.name} ({job.status}) ===\n".encode()
+            async for chunk in self._stream_job_log(f"/projects/{project.id}/jobs/{job.id}/trace"):
+                yield chunk
+
     def check_project_access(self, project_path: str) -> Dict[str, Any]:
         """Check if we have access to project"""
         if not self.client:
             return {"access": False, "reason": "No GitLab token configured"}
 
         try:
-            project = self.client.projects.get(project_path)
+            project = self._get_handle(project_path)
 
             return {
                 "access": True,
@@ -187,4 +214,10 @@ class MCPGitLab:
                 "access": False,
                 "project": project_path,
                 "reason": str(e)
-            }
\ No newline at end of file
+            }
+
+    async def aclose(self):
+        """Close pooled HTTP connections"""
+        await super().aclose()
+        if self.session:
+            await asyncio.to_thread(self.session.close)
\ No newline at end of file
@@ -57,11 +57,15 @@ class MCPPackManager:
 
     def initialize_github_pack(self, token: str = None, allowed_repos: List[str] = None, audit_logger = None):
         """Initialize GitHub MCP pack"""
+        if "github" in self.initialized_packs:
+            return
         logger.info("Initializing GitHub MCP pack")
         self.initialized_packs.add("github")
 
     def initialize_gitlab_pack(self, token: str = None, allowed_repos: List[str] = None, audit_logger = None):
         """Initialize GitLab MCP pack"""
+        if "gitlab" in self.initialized_packs:
+            return
         logger.info("Initializing GitLab MCP pack")
         self.initialized_packs.add("gitlab")
 
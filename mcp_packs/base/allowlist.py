@@ -0,0 +1,25 @@
+from typing import FrozenSet, Iterable, Tuple
+from urllib.parse import urlsplit
+
+
+def repo_key(url: str) -> Tuple[str, str]:
+    """(host, owner/repo path) of a repository URL; host is empty for a bare owner/repo entry"""
+    if url.startswith("git@"):
+        url = "//" + url[4:].replace(":", "/", 1)
+    elif "://" not in url:
+        head = url.split("/", 1)[0]
+        url = ("//" if "." in head or ":" in head else "///") + url
+    parts = urlsplit(url)
+    host = (parts.hostname or "").removeprefix("www.")
+    return host, parts.path.strip("/").removesuffix(".git").lower()
+
+
+def build_allowlist(allowed_repos: Iterable[str]) -> FrozenSet[Tuple[str, str]]:
+    """Exact (host, owner/repo) pairs, so a check is one parse and one set lookup"""
+    return frozenset(map(repo_key, allowed_repos))
+
+
+def is_repo_allowed(repo_url: str, allowlist: FrozenSet[Tuple[str, str]]) -> bool:
+    """Whether repo_url matches an entry exactly; bare owner/repo entries match on any host"""
+    host, path = repo_key(repo_url)
+    return (host, path) in allowlist or ("", path) in allowlist
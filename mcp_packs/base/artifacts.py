@@ -0,0 +1,12 @@
+from typing import Any, Dict
+
+
+def artifacts_markdown(artifacts: Dict[str, Any]) -> str:
+    """Markdown comment body listing each dry-run/plan artifact"""
+    parts = ["## F-Ops Dry-Run Artifacts\n\n"]
+    parts.extend(
+        f"### {artifact_type.title()}\n\n```\n{content}\n```\n\n"
+        for artifact_type, content in artifacts.items()
+    )
+    parts.append("---\n*Generated by F-Ops Pipeline Agent*")
+    return "".join(parts)
@@ -0,0 +1,14 @@
+from github import Github
+
+# Concurrent blob uploads per batched commit; GitHub's secondary rate limits kick in above ~2 parallel writes
+BLOB_CONCURRENCY = 2
+
+# Keep-alive pool shared by every call a client makes
+_HTTP_POOL_SIZE = 20
+_HTTP_TIMEOUT = 30
+
+
+def build_github_client(token: str) -> Github:
+    """GitHub client with the connection settings shared by the GitHub pack and MCP server"""
+    # PyGithub's default GithubRetry already waits out 403/429 rate limits across up to 10 attempts
+    return Github(token, pool_size=_HTTP_POOL_SIZE, timeout=_HTTP_TIMEOUT)
@@ -1,11 +1,19 @@
-from github import Github
+from github import InputGitTreeElement
 from github.GithubException import GithubException
 from mcp_packs.base.mcp_pack import MCPPack
+from mcp_packs.base.allowlist import build_allowlist, is_repo_allowed
+from mcp_packs.base.artifacts import artifacts_markdown
+from mcp_packs.github.client import BLOB_CONCURRENCY, build_github_client
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Matches https://github.com/<owner>/<repo>/pull/<number>
+_PR_URL_RE = re.compile(r'github\.com/([^/]+)/([^/]+)/pull/(\d+)')
+
 class GitHubPack(MCPPack):
     """GitHub MCP Pack for repository and CI/CD operations"""
 
@@ -20,11 +28,12 @@ class GitHubPack(MCPPack):
     def initialize(self):
         """Initialize GitHub client"""
         try:
-            self.client = Github(self.config['token'])
+            self.client = build_github_client(self.config['token'])
             # Test connection
             self.user = self.client.get_user()
             self.audit_logger = self.config.get('audit_logger')
             self.allowed_repos = self.config.get('allowed_repos', [])
+            self._allowlist = build_allowlist(self.allowed_repos)
             logger.info(f"GitHub Pack initialized for user: {self.user.login}")
         except Exception as e:
             logger.error(f"Failed to initialize GitHub client: {e}")
@@ -43,7 +52,8 @@ class GitHubPack(MCPPack):
             'get_pull_requests': self.get_pull_requests,
             'merge_pr': self.merge_pr,
             'create_release': self.create_release,
-            'attach_artifacts': self.attach_artifacts
+            'attach_artifacts': self.attach_artifacts,
+            'batch_create_commit': self.batch_create_commit
         }
         
         if action not in actions:
@@ -64,7 +74,8 @@ class GitHubPack(MCPPack):
             'get_pull_requests',
             'merge_pr',
             'create_release',
-            'attach_artifacts'
+            'attach_artifacts',
+            'batch_create_commit'
         ]
     
     def validate_repo(self, repo_url: str) -> bool:
@@ -73,8 +84,7 @@ class GitHubPack(MCPPack):
             logger.warning("No allow-listed repos configured - allowing all")
             return True
 
-        is_allowed = any(allowed in repo_url for allowed in self.allowed_repos)
-        if not is_allowed:
+        if not is_repo_allowed(repo_url, self._allowlist):
             logger.error(f"Repository not allow-listed: {repo_url}")
             raise ValueError(f"Repository not allow-listed: {repo_url}")
 
@@ -106,27 +116,16 @@ class GitHubPack(MCPPack):
                     # Branch might already exist
                     pass
 
-                # Add files if provided
-                if 'files' in params:
-                    for file_path, content in params['files'].items():
-                        try:
-                            # Try to get existing file
-                            existing_file = repo.get_contents(file_path, ref=params['branch_name'])
-                            repo.update_file(
-                                path=file_path,
-                                message=f"Update {file_path}",
-                                content=content,
-                                sha=existing_file.sha,
-                                branch=params['branch_name']
-                            )
-                        except GithubException:
-                            # Create new file
-                            repo.create_file(
-                                path=file_path,
-                                message=f"Add {file_path}",
-                                content=content,
-                                branch=params['branch_name']
-                            )
+                # Add files if provided - batched payloads go in as a single commit
+                if 'files_batch' in params:
+                    self._commit_files_batch(
+                        repo,
+                        params['files_batch'],
+                        params['branch_name'],
+                        params.get('commit_message', "Add F-Ops generated files")
+                    )
+                elif 'files' in params:
+                    self._commit_files_individually(repo, params['files'], params['branch_name'])
 
             # Create PR
             head_branch = params.get('branch_name') or params.get('head_branch')
@@ -147,7 +146,7 @@ class GitHubPack(MCPPack):
                     repo_url=params.get('repo_url', f"https://github.com/{repo_name}"),
                     pr_url=pr.html_url,
                     agent="mcp_github",
-                    files=params.get('files', {})
+                    files=params.get('files_batch') or params.get('files', {})
                 )
 
             return {
@@ -163,6 +162,87 @@ class GitHubPack(MCPPack):
                 'error': str(e)
             }
     
+    def batch_create_commit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Commit many files to a branch with one tree, one commit and one ref update"""
+        try:
+            repo_name = params.get('repository') or params.get('repo_name')
+            if not repo_name:
+                raise ValueError("Either 'repository' or 'repo_name' parameter is required")
+
+            repo = self.client.get_repo(repo_name)
+            commit_sha = self._commit_files_batch(
+                repo,
+                params['files_batch'],
+                params['branch_name'],
+                params.get('commit_message', "Add F-Ops generated files")
+            )
+
+            return {
+                'success': True,
+                'commit_sha': commit_sha,
+                'files_committed': len(params['files_batch'])
+            }
+        except GithubException as e:
+            logger.error(f"Failed to create batched commit: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def _commit_files_batch(self, repo, files: Dict[str, str], branch: str, message: str) -> Optional[str]:
+        """Upload blobs concurrently, then write a single tree/commit and move the branch ref"""
+        if not files:
+            return None
+
+        try:
+            def get_parent():
+                ref = repo.get_git_ref(f"heads/{branch}")
+                return ref, repo.get_git_commit(ref.object.sha)
+
+            def create_blob(item):
+                path, content = item
+                blob = repo.create_git_blob(content, "utf-8")
+                return InputGitTreeElement(path=path, mode='100644', type='blob', sha=blob.sha)
+
+            # The branch head lookup does not depend on the blobs, so it overlaps with the uploads
+            with ThreadPoolExecutor(max_workers=min(BLOB_CONCURRENCY, len(files)) + 1) as executor:
+                parent_future = executor.submit(get_parent)
+                elements = list(executor.map(create_blob, files.items()))
+                ref, parent = parent_future.result()
+
+            tree = repo.create_git_tree(elements, base_tree=parent.tree)
+            commit = repo.create_git_commit(message, tree, [parent])
+            ref.edit(commit.sha)
+            return commit.sha
+        except GithubException as e:
+            if e.status != 422:
+                raise
+            logger.warning(f"Batched commit rejected ({e}), falling back to per-file commits")
+            self._commit_files_individually(repo, files, branch)
+            return None
+
+    def _commit_files_individually(self, repo, files: Dict[str, str], branch: str):
+        """Create or update each file with its own commit"""
+        for file_path, content in files.items():
+            try:
+                # Try to get existing file
+                existing_file = repo.get_contents(file_path, ref=branch)
+                repo.update_file(
+                    path=file_path,
+                    message=f"Update {file_path}",
+                    content=content,
+                    sha=existing_file.sha,
+                    branch=branch
+                )
+            except GithubException:
+                # Create new file
+                repo.create_file(
+                    path=file_path,
+                    message=f"Add {file_path}",
+                    content=content,
+                    branch=branch
+                )
+
     def get_workflows(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Get GitHub Actions workflows for a repository"""
         try:
@@ -404,6 +484,12 @@ class GitHubPack(MCPPack):
                 'error': str(e)
             }
     
+    def cleanup(self):
+        """Close pooled HTTP connections"""
+        client = getattr(self, 'client', None)
+        if client is not None:
+            client.close()
+
     def health_check(self) -> Dict[str, Any]:
         """Check GitHub connection health"""
         try:
@@ -435,8 +521,7 @@ class GitHubPack(MCPPack):
             artifacts = params['artifacts']
 
             # Parse PR URL to get repo and PR number
-            import re
-            match = re.search(r'github\.com/([^/]+)/([^/]+)/pull/(\d+)', pr_url)
+            match = _PR_URL_RE.search(pr_url)
             if not match:
                 raise ValueError("Invalid GitHub PR URL")
 
@@ -445,15 +530,7 @@ class GitHubPack(MCPPack):
             pr = repo.get_pull(int(pr_number))
 
             # Format artifacts as markdown comment
-            comment_body = "## F-Ops Dry-Run Artifacts\n\n"
-
-            for artifact_type, content in artifacts.items():
-                comment_body += f"### {artifact_type.title()}\n\n"
-                comment_body += "```\n"
-                comment_body += str(content)
-                comment_body += "\n```\n\n"
-
-            comment_body += "---\n*Generated by F-Ops Pipeline Agent*"
+            comment_body = artifacts_markdown(artifacts)
 
             # Add comment to PR
             pr.create_issue_comment(comment_body)
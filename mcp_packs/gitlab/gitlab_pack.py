@@ -1,11 +1,34 @@
 import gitlab
+import requests
 from gitlab.exceptions import GitlabError
 from mcp_packs.base.mcp_pack import MCPPack
+from mcp_packs.base.allowlist import build_allowlist, is_repo_allowed
+from mcp_packs.base.artifacts import artifacts_markdown
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, List, Optional
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Matches https://gitlab.com/<namespace>/<project>/-/merge_requests/<iid>
+_MR_URL_RE = re.compile(r'gitlab\.com/([^/]+/[^/]+)/-/merge_requests/(\d+)')
+
+
+def _build_session() -> requests.Session:
+    """Keep-alive session with a bounded connection pool and retries on transient gateway errors"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
 class GitLabPack(MCPPack):
     """GitLab MCP Pack for repository and CI/CD operations"""
 
@@ -20,11 +43,13 @@ class GitLabPack(MCPPack):
     def initialize(self):
         """Initialize GitLab client"""
         try:
-            self.client = gitlab.Gitlab('https://gitlab.com', private_token=self.config['token'])
+            self.session = _build_session()
+            self.client = gitlab.Gitlab('https://gitlab.com', private_token=self.config['token'], session=self.session)
             self.client.auth()
             self.user = self.client.user
             self.audit_logger = self.config.get('audit_logger')
             self.allowed_repos = self.config.get('allowed_repos', [])
+            self._allowlist = build_allowlist(self.allowed_repos)
             logger.info(f"GitLab Pack initialized for user: {self.user.username}")
         except Exception as e:
             logger.error(f"Failed to initialize GitLab client: {e}")
@@ -43,7 +68,8 @@ class GitLabPack(MCPPack):
             'get_merge_requests': self.get_merge_requests,
             'merge_mr': self.merge_mr,
             'create_release': self.create_release,
-            'attach_artifacts': self.attach_artifacts
+            'attach_artifacts': self.attach_artifacts,
+            'batch_create_commit': self.batch_create_commit
         }
 
         if action not in actions:
@@ -64,7 +90,8 @@ class GitLabPack(MCPPack):
             'get_merge_requests',
             'merge_mr',
             'create_release',
-            'attach_artifacts'
+            'attach_artifacts',
+            'batch_create_commit'
         ]
 
     def validate_repo(self, repo_url: str) -> bool:
@@ -73,8 +100,7 @@ class GitLabPack(MCPPack):
             logger.warning("No allow-listed repos configured - allowing all")
             return True
 
-        is_allowed = any(allowed in repo_url for allowed in self.allowed_repos)
-        if not is_allowed:
+        if not is_repo_allowed(repo_url, self._allowlist):
             logger.error(f"Repository not allow-listed: {repo_url}")
             raise ValueError(f"Repository not allow-listed: {repo_url}")
 
@@ -95,22 +121,16 @@ class GitLabPack(MCPPack):
             }
             branch = project.branches.create(branch_data)
 
-            # Add/update files
-            for file_path, content in params['files'].items():
-                try:
-                    # Try to get existing file
-                    existing_file = project.files.get(file_path, ref=params['branch_name'])
-                    existing_file.content = content
-                    existing_file.save(branch=params['branch_name'], commit_message=f"Update {file_path}")
-                except GitlabError:
-                    # Create new file
-                    file_data = {
-                        'file_path': file_path,
-                        'branch': params['branch_name'],
-                        'content': content,
-                        'commit_message': f"Add {file_path}"
-                    }
-                    project.files.create(file_data)
+            # Add/update files - batched payloads go in as a single commit
+            if 'files_batch' in params:
+                self._commit_files_batch(
+                    project,
+                    params['files_batch'],
+                    params['branch_name'],
+                    params.get('commit_message', "Add F-Ops generated files")
+                )
+            else:
+                self._commit_files_individually(project, params['files'], params['branch_name'])
 
             # Create MR
             mr_data = {
@@ -127,7 +147,7 @@ class GitLabPack(MCPPack):
                     repo_url=params['repo_url'],
                     pr_url=mr.web_url,
                     agent="mcp_gitlab",
-                    files=params['files']
+                    files=params.get('files_batch') or params.get('files', {})
                 )
 
             return {
@@ -144,6 +164,69 @@ class GitLabPack(MCPPack):
                 'error': str(e)
             }
 
+    def batch_create_commit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Commit many files to a branch through a single Commits API call"""
+        try:
+            project = self.client.projects.get(params['project_id'], lazy=True)
+            commit_id = self._commit_files_batch(
+                project,
+                params['files_batch'],
+                params['branch_name'],
+                params.get('commit_message', "Add F-Ops generated files")
+            )
+
+            return {
+                'success': True,
+                'commit_sha': commit_id,
+                'files_committed': len(params['files_batch'])
+            }
+        except GitlabError as e:
+            logger.error(f"Failed to create batched commit: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def _commit_files_batch(self, project, files: Dict[str, str], branch: str, message: str) -> Optional[str]:
+        """Send every file as one commit with an actions array"""
+        if not files:
+            return None
+
+        commit_data = {
+            'branch': branch,
+            'commit_message': message,
+            'actions': [
+                {'action': 'create', 'file_path': file_path, 'content': content}
+                for file_path, content in files.items()
+            ]
+        }
+
+        try:
+            return project.commits.create(commit_data).id
+        except GitlabError as e:
+            # Rejected when a file already exists on the branch; the per-file path handles updates
+            logger.warning(f"Batched commit rejected ({e}), falling back to per-file commits")
+            self._commit_files_individually(project, files, branch)
+            return None
+
+    def _commit_files_individually(self, project, files: Dict[str, str], branch: str):
+        """Create or update each file with its own commit"""
+        for file_path, content in files.items():
+            try:
+                # Try to get existing file
+                existing_file = project.files.get(file_path, ref=branch)
+                existing_file.content = content
+                existing_file.save(branch=branch, commit_message=f"Update {file_path}")
+            except GitlabError:
+                # Create new file
+                file_data = {
+                    'file_path': file_path,
+                    'branch': branch,
+                    'content': content,
+                    'commit_message': f"Add {file_path}"
+                }
+                project.files.create(file_data)
+
     def get_pipelines(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Get GitLab CI pipelines for a project"""
         try:
@@ -406,8 +489,7 @@ class GitLabPack(MCPPack):
         """Attach dry-run/plan artifacts to MR as note"""
         try:
             # Parse MR URL to get project and MR IID
-            import re
-            match = re.search(r'gitlab\.com/([^/]+/[^/]+)/-/merge_requests/(\d+)', pr_url)
+            match = _MR_URL_RE.search(pr_url)
             if not match:
                 raise ValueError("Invalid GitLab MR URL")
 
@@ -416,15 +498,7 @@ class GitLabPack(MCPPack):
             mr = project.mergerequests.get(int(mr_iid))
 
             # Format artifacts as markdown note
-            note_body = "## F-Ops Dry-Run Artifacts\n\n"
-
-            for artifact_type, content in artifacts.items():
-                note_body += f"### {artifact_type.title()}\n\n"
-                note_body += "```\n"
-                note_body += str(content)
-                note_body += "\n```\n\n"
-
-            note_body += "---\n*Generated by F-Ops Pipeline Agent*"
+            note_body = artifacts_markdown(artifacts)
 
             # Add note to MR
             note_data = {'body': note_body}
@@ -467,6 +541,12 @@ class GitLabPack(MCPPack):
                 "reason": str(e)
             }
 
+    def cleanup(self):
+        """Close pooled HTTP connections"""
+        session = getattr(self, 'session', None)
+        if session is not None:
+            session.close()
+
     def health_check(self) -> Dict[str, Any]:
         """Check GitLab connection health"""
         try:
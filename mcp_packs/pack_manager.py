@@ -25,7 +25,10 @@ class MCPPackManager:
             return False
 
     def initialize_github_pack(self, token: str, allowed_repos: List[str] = None, audit_logger=None) -> bool:
-        """Initialize GitHub MCP pack"""
+        """Initialize GitHub MCP pack (no-op if already initialized)"""
+        if self._is_initialized('github'):
+            return True
+
         config = {
             'token': token,
             'allowed_repos': allowed_repos or [],
@@ -34,7 +37,10 @@ class MCPPackManager:
         return self.register_pack('github', GitHubPack, config)
 
     def initialize_gitlab_pack(self, token: str, allowed_repos: List[str] = None, audit_logger=None) -> bool:
-        """Initialize GitLab MCP pack"""
+        """Initialize GitLab MCP pack (no-op if already initialized)"""
+        if self._is_initialized('gitlab'):
+            return True
+
         config = {
             'token': token,
             'allowed_repos': allowed_repos or [],
@@ -50,6 +56,11 @@ class MCPPackManager:
         }
         return self.register_pack('kb', KnowledgeBasePack, config)
 
+    def _is_initialized(self, name: str) -> bool:
+        """Check whether a pack is registered and connected"""
+        pack = self.packs.get(name)
+        return pack is not None and pack.initialized
+
     def get_pack(self, name: str) -> Optional[MCPPack]:
         """Get a registered pack by name"""
         return self.packs.get(name)
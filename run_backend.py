@@ -2,15 +2,14 @@
 """
 F-Ops Backend Runner
 
-This script sets up the proper Python path and starts the FastAPI backend.
+This script starts the FastAPI backend from the backend directory with the project root importable.
 """
-import sys
 import os
 import uvicorn
 
-# Add the project root to Python path
+# The project root (this script's directory) is already sys.path[0], and uvicorn's
+# reload worker inherits the parent's sys.path, so mcp_packs resolves without edits
 project_root = os.path.dirname(os.path.abspath(__file__))
-sys.path.insert(0, project_root)
 
 # Change to backend directory for relative imports
 backend_dir = os.path.join(project_root, 'backend')
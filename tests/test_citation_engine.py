@@ -0,0 +1,32 @@
+import sys
+import os
+
+# Add backend directory to path so the app package resolves
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.core.citation_engine import CitationEngine
+
+def test_generate_citations_without_sources():
+    """Content without KB sources is returned unchanged"""
+    engine = CitationEngine(kb_manager=None)
+    assert engine.generate_citations("Deploy with Helm", []) == "Deploy with Helm"
+
+def test_generate_citations_with_empty_citation_list():
+    """The citation footer keeps its trailing newline when no citation lines follow"""
+    class EmptySources(list):
+        def __bool__(self):
+            return True
+
+    engine = CitationEngine(kb_manager=None)
+    assert engine.generate_citations("Deploy with Helm", EmptySources()) == "Deploy with Helm\n\n# Citations\n"
+
+def test_generate_citations_footer():
+    """Each source becomes a numbered citation line under the footer"""
+    engine = CitationEngine(kb_manager=None)
+    sources = [
+        {"citation": "[docs:1]", "metadata": {"title": "Helm guide"}},
+        {"citation": "[iac:2]", "metadata": {}},
+    ]
+    assert engine.generate_citations("Deploy", sources) == (
+        "Deploy\n\n# Citations\n[1] [docs:1]: Helm guide\n[2] [iac:2]: Untitled"
+    )
@@ -0,0 +1,38 @@
+import pytest
+import sys
+import os
+
+# Add backend directory to path so the app package resolves
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain")
+
+from app.core.knowledge_base import _SearchResultCache, _merge_tiny
+
+def test_search_cache_misses_different_queries():
+    """Near-but-different queries must not share cached results"""
+    cache = _SearchResultCache()
+    cache.put("docs", 5, "deploy to staging", [{"id": "staging-doc"}])
+    assert cache.get("docs", 5, "deploy to production") is None
+    assert cache.get("docs", 5, "  Deploy to   STAGING ") == [{"id": "staging-doc"}]
+
+def test_search_cache_returns_copies():
+    """Mutating returned results leaves the cached entry intact"""
+    cache = _SearchResultCache()
+    cache.put("docs", 5, "helm chart", [{"id": "a", "metadata": {"source": "x"}}])
+    results = cache.get("docs", 5, "helm chart")
+    results[0]["metadata"]["source"] = "changed"
+    assert cache.get("docs", 5, "helm chart")[0]["metadata"]["source"] == "x"
+
+def test_merge_tiny_keeps_repeated_words_without_overlap():
+    """A chunk starting with the words the previous one ended with keeps them when there is no overlap"""
+    content = "run the deploy step\n\ndeploy step runs helm"
+    chunks = ["run the deploy step", "deploy step runs helm"]
+    assert _merge_tiny(content, chunks) == [content]
+
+def test_merge_tiny_drops_splitter_overlap():
+    """Text repeated by the splitter's overlap appears once, with the original separator"""
+    content = "alpha beta gamma delta"
+    chunks = ["alpha beta gamma", "gamma delta"]
+    assert _merge_tiny(content, chunks) == [content]